@@ -1,43 +1,107 @@
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 from strands import Agent
+from strands.models import BedrockModel
+import asyncio
 import logging
 import os
-import boto3 
+import time
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+from botocore.config import Config as BotocoreConfig
 from dotenv import load_dotenv
+from llm_cache import LLMCache
+from batcher import Batcher
 
 # Load environment variables from .env file if it exists
 load_dotenv()
 
-# Set up logging first
-logging.basicConfig(level=logging.INFO)
+# Set up logging first (LOG_LEVEL=WARNING in production keeps per-request logs off the hot path)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(levelname)s %(name)s: %(message)s"
+)
 logger = logging.getLogger(__name__)
 
 # Configure AWS credentials for Bedrock access
 # This ensures the agent can access AWS Bedrock models
 os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
 
-# Verify AWS credentials are available
-try:
-    # Test if we can create a Bedrock client
-    bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
-    logger.info("✅ AWS credentials configured successfully")
-except Exception as e:
-    logger.warning(f"⚠️ AWS credentials issue: {e}")
-    logger.info("💡 Make sure you have AWS credentials configured via:")
-    logger.info("   - AWS CLI: aws configure")
-    logger.info("   - Environment variables: AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY")
-    logger.info("   - IAM role (if running on EC2/ECS)")
+# Bounded pool for the blocking Bedrock stream that Strands hands off via
+# asyncio.to_thread; size it to the Bedrock concurrency we can sustain
+STRANDS_POOL = int(os.getenv("STRANDS_POOL", "32"))
+strands_executor = ThreadPoolExecutor(
+    max_workers=STRANDS_POOL,
+    thread_name_prefix="strands"
+)
+
+# One long-lived Bedrock client shared by every request; give it enough pooled
+# keep-alive connections for all executor threads so TLS handshakes are amortized
+bedrock_client_config = BotocoreConfig(
+    max_pool_connections=max(32, STRANDS_POOL),
+    retries={"mode": "adaptive", "max_attempts": 3},
+    connect_timeout=2,
+    read_timeout=60,
+    tcp_keepalive=True
+)
+
+# Set LOG_BODIES=1 (with DEBUG logging) to dump request headers and bodies
+LOG_BODIES = os.getenv("LOG_BODIES") == "1"
 
-app = FastAPI(title="Strands Agent Server", version="1.0.0")
+# Set DEBUG_ROUTES=1 to expose the legacy aliases, health/info routes and the OpenAPI docs;
+# the AgentCore contract only needs /invocations and /ping
+DEBUG_ROUTES = os.getenv("DEBUG_ROUTES") == "1"
+
+app = FastAPI(
+    title="Strands Agent Server",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    docs_url="/docs" if DEBUG_ROUTES else None,
+    redoc_url="/redoc" if DEBUG_ROUTES else None,
+    openapi_url="/openapi.json" if DEBUG_ROUTES else None
+)
+
+@lru_cache(maxsize=1)
+def _iso_timestamp(second: int) -> str:
+    """UTC ISO-8601 timestamp, formatted once per wall-clock second"""
+    return datetime.fromtimestamp(second, tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+def utc_timestamp() -> str:
+    """Current UTC timestamp in the naive ISO format the API has always returned"""
+    return _iso_timestamp(int(time.time()))
 
 # Initialize Strands agent with AWS Bedrock model
 # Using Mistral Large since we have access to it
-strands_agent = Agent(
-    model="anthropic.claude-3-5-sonnet-20240620-v1:0",
-    system_prompt="You are a helpful AI assistant. Provide clear, accurate, and helpful responses to user queries."
+MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+SYSTEM_PROMPT = "You are a helpful AI assistant. Provide clear, accurate, and helpful responses to user queries."
+
+# Claude prompt caching for the static system prompt; set PROMPT_CACHE_TYPE=default
+# on models that support Bedrock cache points (Claude 3.5 Sonnet v2, 3.7, ...)
+PROMPT_CACHE_TYPE = os.getenv("PROMPT_CACHE_TYPE")
+
+bedrock_model = BedrockModel(
+    model_id=MODEL_ID,
+    boto_client_config=bedrock_client_config,
+    **({"cache_prompt": PROMPT_CACHE_TYPE} if PROMPT_CACHE_TYPE else {})
+)
+
+def new_strands_agent() -> Agent:
+    """Create a per-request agent sharing the Bedrock model and its client.
+    Agents carry conversation history, so concurrent requests must not share one."""
+    return Agent(
+        model=bedrock_model,
+        system_prompt=SYSTEM_PROMPT
+    )
+
+# Exact-match response cache. The agent samples at Bedrock's default temperature, so it is
+# off unless LLM_CACHE_TTL is set (only sensible at temperature 0)
+llm_cache = LLMCache(
+    maxsize=int(os.getenv("LLM_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("LLM_CACHE_TTL", "0"))
 )
 
 class InvocationRequest(BaseModel):
@@ -46,53 +110,107 @@ class InvocationRequest(BaseModel):
 class InvocationResponse(BaseModel):
     output: Dict[str, Any]
 
+@app.on_event("startup")
+async def configure_executor():
+    """Route Strands' worker threads through the bounded executor"""
+    asyncio.get_running_loop().set_default_executor(strands_executor)
+
+@app.on_event("startup")
+async def start_batcher():
+    """Start the micro-batching loop"""
+    batcher.start()
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    """Drain in-flight model calls before the worker exits"""
+    await batcher.stop()
+    strands_executor.shutdown(wait=True)
+
+@app.on_event("startup")
+async def verify_aws_credentials():
+    """Verify the AWS credentials with one STS call, off the event loop"""
+    try:
+        identity = await asyncio.to_thread(boto3.client("sts").get_caller_identity)
+        logger.info(f"✅ AWS credentials configured successfully (account {identity['Account']})")
+    except Exception as e:
+        logger.warning(f"⚠️ AWS credentials issue: {e}")
+        logger.info("💡 Make sure you have AWS credentials configured via:")
+        logger.info("   - AWS CLI: aws configure")
+        logger.info("   - Environment variables: AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY")
+        logger.info("   - IAM role (if running on EC2/ECS)")
+
+@app.on_event("startup")
+async def warm_prompt_cache():
+    """Seed the Bedrock prompt cache with the system prompt prefix"""
+    if not PROMPT_CACHE_TYPE:
+        return
+    
+    async def warmup():
+        try:
+            # Separate agent so the warmup turn stays out of the conversation history
+            warmup_agent = Agent(model=bedrock_model, system_prompt=SYSTEM_PROMPT, callback_handler=None)
+            await warmup_agent.invoke_async("ping")
+            logger.info("🔥 Prompt cache warmed")
+        except Exception as e:
+            logger.warning(f"⚠️ Prompt cache warmup failed: {e}")
+    
+    app.state.prompt_cache_warmup = asyncio.create_task(warmup())
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log all incoming requests for debugging"""
-    logger.info(f"🔍 Incoming request: {request.method} {request.url}")
-    logger.info(f"🔍 Headers: {dict(request.headers)}")
+    logger.info("Incoming request: %s %s", request.method, request.url.path)
     
-    # Log request body if it exists
-    if request.method in ["POST", "PUT", "PATCH"]:
-        try:
-            body = await request.body()
-            if body:
-                logger.info(f"🔍 Request body: {body.decode()}")
-        except Exception as e:
-            logger.info(f"🔍 Could not read request body: {e}")
+    # Headers and bodies are only dumped when explicitly debugging; reading the body
+    # here buffers it a second time before the handler parses it
+    if LOG_BODIES and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Headers: %s", dict(request.headers))
+        if request.method in ["POST", "PUT", "PATCH"]:
+            try:
+                # Starlette caches the body on the request and replays it downstream
+                body = await request.body()
+                if body:
+                    logger.debug("Request body: %s", body.decode())
+            except Exception as e:
+                logger.debug("Could not read request body: %s", e)
     
     response = await call_next(request)
-    logger.info(f"🔍 Response status: {response.status_code}")
+    logger.info("Response status: %d", response.status_code)
     return response
 
-@app.post("/invocations", response_model=InvocationResponse)
-async def invoke_agent(request: InvocationRequest):
-    """
-    REQUIRED endpoint for Bedrock AgentCore service contract
-    Must handle: {"input": {"prompt": "..."}}
-    """
-    logger.info(f"🎯 /invocations endpoint called with: {request}")
-    return await invoke_agent_logic(request)
-
-@app.post("/", response_model=InvocationResponse)
-async def invoke_agent_root(request: InvocationRequest):
-    """
-    Root endpoint that Bedrock AgentCore might be calling
-    """
-    logger.info(f"🎯 / (root) endpoint called with: {request}")
-    return await invoke_agent_logic(request)
+async def run_strands_agent(user_message: str) -> str:
+    """Run a single prompt through Strands and extract the response text"""
+    # Use the native async entry point so concurrent requests overlap;
+    # the blocking Bedrock stream runs on strands_executor
+    result = await new_strands_agent().invoke_async(user_message)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Strands result: %r", result)
+    
+    # Extract the actual text content from the strands response
+    # The response structure is: {'role': 'assistant', 'content': [{'text': 'actual message'}]}
+    if isinstance(result.message, dict) and 'content' in result.message:
+        # Extract text from content array
+        content = result.message['content']
+        if content and isinstance(content[0], dict) and 'text' in content[0]:
+            return content[0]['text']
+        return str(content)
+    return str(result.message)
 
-@app.post("/invoke", response_model=InvocationResponse)
-async def invoke_agent_alt(request: InvocationRequest):
-    """
-    Alternative endpoint for Bedrock AgentCore service contract
-    """
-    logger.info(f"🎯 /invoke endpoint called with: {request}")
-    return await invoke_agent_logic(request)
+# Coalesces concurrent /invocations; each prompt is still its own model call, so the
+# collection window is off unless BATCH_MAX_LATENCY_MS is set. BATCH_DEDUPE=1 shares one
+# answer between identical prompts, which is only sensible at temperature 0, like LLM_CACHE_TTL
+batcher = Batcher(
+    run_strands_agent,
+    max_batch=int(os.getenv("BATCH_MAX_SIZE", "16")),
+    max_latency_ms=float(os.getenv("BATCH_MAX_LATENCY_MS", "0")),
+    dedupe=os.getenv("BATCH_DEDUPE") == "1"
+)
 
+@app.post("/invocations", response_model=InvocationResponse)
 async def invoke_agent_logic(request: InvocationRequest):
     """
-    Common logic for all invocation endpoints
+    REQUIRED endpoint for Bedrock AgentCore service contract
+    Must handle: {"input": {"prompt": "..."}}
     """
     try:
         # Extract prompt from the correct format: {"input": {"prompt": "..."}}
@@ -103,23 +221,18 @@ async def invoke_agent_logic(request: InvocationRequest):
                 detail="No prompt found in input. Please provide a 'prompt' key in the input."
             )
 
-        logger.info(f"🤖 Processing message: {user_message}")
-        result = strands_agent(user_message)
-        logger.info(f"🤖 Strands result: {result}")
+        logger.debug("Processing message: %s", user_message)
+        cache_key = LLMCache.make_key(MODEL_ID, SYSTEM_PROMPT, user_message)
+        message_text = await llm_cache.get(cache_key) if llm_cache.enabled else None
         
-        # Extract the actual text content from the strands response
-        # The response structure is: {'role': 'assistant', 'content': [{'text': 'actual message'}]}
-        if isinstance(result.message, dict) and 'content' in result.message:
-            # Extract text from content array
-            content = result.message['content']
-            if content and isinstance(content[0], dict) and 'text' in content[0]:
-                message_text = content[0]['text']
-            else:
-                message_text = str(content)
+        if message_text is not None:
+            logger.debug("Served response from LLM cache")
         else:
-            message_text = str(result.message)
+            message_text = await batcher.submit(user_message)
+            if llm_cache.enabled:
+                await llm_cache.set(cache_key, message_text)
         
-        logger.info(f"📝 Extracted message: {message_text}")
+        logger.debug("Extracted message: %s", message_text)
         
         # Follow EXACT Bedrock AgentCore response format from AWS documentation
         response = {
@@ -127,15 +240,16 @@ async def invoke_agent_logic(request: InvocationRequest):
                 "role": "assistant", 
                 "content": [{"text": message_text}]
             },
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": utc_timestamp(),
             "model": "strands-agent"
         }
 
-        logger.info(f"✅ Returning response: {response}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Returning response: %r", response)
         return InvocationResponse(output=response)
 
     except Exception as e:
-        logger.error(f"❌ Error in invoke_agent_logic: {e}", exc_info=True)
+        logger.error("Error in invoke_agent_logic: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Agent processing failed: {str(e)}")
 
 @app.get("/ping")
@@ -143,42 +257,65 @@ async def ping():
     """
     REQUIRED health check endpoint for Bedrock AgentCore service contract
     """
-    logger.info("🏓 /ping endpoint called")
+    logger.debug("/ping endpoint called")
     return {"status": "healthy"}
 
-@app.get("/health")
+async def metrics():
+    """LLM cache hit/miss counters"""
+    return {"llm_cache": llm_cache.stats()}
+
 async def health_check():
     """Health check endpoint for Bedrock AgentCore"""
-    logger.info("🏥 /health endpoint called")
+    logger.debug("/health endpoint called")
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": utc_timestamp(),
         "service": "strands-agent",
         "version": "1.0.0"
     }
 
-@app.get("/healthz")
 async def healthz():
     """Alternative health check endpoint (common in containerized apps)"""
-    logger.info("🏥 /healthz endpoint called")
+    logger.debug("/healthz endpoint called")
     return {"status": "ok"}
 
-@app.get("/info")
 async def info():
     """Info endpoint for basic connectivity test"""
-    logger.info("🏠 /info endpoint called")
+    logger.debug("/info endpoint called")
     return {
         "message": "Strands Agent Server is running",
         "endpoints": {
             "health": "/health",
             "healthz": "/healthz",
             "ping": "/ping",
+            "metrics": "/metrics",
             "invocations": "/invocations (REQUIRED)",
             "invoke": "/invoke",
             "root": "/ (POST)"
         }
     }
 
+if DEBUG_ROUTES:
+    # Aliases kept for local debugging; the deployed runtime only calls /invocations and /ping
+    app.add_api_route("/", invoke_agent_logic, methods=["POST"],
+                      response_model=InvocationResponse, include_in_schema=False)
+    app.add_api_route("/invoke", invoke_agent_logic, methods=["POST"],
+                      response_model=InvocationResponse, include_in_schema=False)
+    app.add_api_route("/health", health_check, methods=["GET"], include_in_schema=False)
+    app.add_api_route("/healthz", healthz, methods=["GET"], include_in_schema=False)
+    app.add_api_route("/info", info, methods=["GET"], include_in_schema=False)
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
+    # uvloop + httptools come with uvicorn[standard]; multiple workers need the import string
+    uvicorn.run(
+        "agent:app",
+        host="0.0.0.0",
+        port=8080,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        log_level="info",
+        access_log=False
+    )
\ No newline at end of file
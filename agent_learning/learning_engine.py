@@ -3,20 +3,53 @@ Learning Engine for AI Agent Twins
 Handles agent learning from real conversations and style adaptation
 """
 
-import json
 import re
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, field
 import logging
+import orjson
 from collections import Counter
-import numpy as np
+from itertools import islice
 
 from .memory_manager import MemoryManager, MemoryEntry
-from .style_analyzer import StyleAnalyzer
+from .style_analyzer import StyleAnalyzer, StyleAnalysis
 
 logger = logging.getLogger(__name__)
 
+# Technical vocabulary; the core terms drive scoring, the full list drives extraction
+CORE_TECH_TERMS = (
+    'api', 'database', 'server', 'client', 'frontend', 'backend',
+    'react', 'node', 'python', 'javascript', 'sql', 'aws', 'cloud',
+    'docker', 'kubernetes', 'microservices', 'architecture'
+)
+TECH_TERMS = CORE_TECH_TERMS + (
+    'deployment', 'scalability', 'performance', 'security',
+    'authentication', 'authorization'
+)
+
+def _json(obj: Any) -> str:
+    """Serialize to a JSON string via orjson (C-accelerated, compact)"""
+    return orjson.dumps(obj).decode()
+
+# Seconds a personality lookup (including "no personality yet") stays cached
+PERSONALITY_CACHE_TTL = 60
+
+# Knowledge extraction patterns
+CODE_BLOCK_PATTERN = re.compile(r'```[\s\S]*?```')
+URL_PATTERN = re.compile(r'https?://\S+')
+MAX_KNOWLEDGE_SNIPPETS = 10
+MAX_ANALYZE_LEN = 64 * 1024  # bound regex work on very large responses
+TOP_PREFERRED_TERMS = 20
+MAX_TRACKED_TERMS = 40
+
+def _compile_terms(terms) -> re.Pattern:
+    """Compile terms into one case-insensitive scan with substring semantics"""
+    # Zero-width lookahead so overlapping terms (e.g. 'awsecurity') are all reported
+    alternation = '|'.join(map(re.escape, sorted(terms, key=len, reverse=True)))
+    return re.compile(f'(?=({alternation}))', re.IGNORECASE)
+
 @dataclass
 class LearningPattern:
     """Pattern learned from conversations"""
@@ -36,6 +69,21 @@ class AgentPersonality:
     learned_phrases: List[str]
     expertise_areas: List[str]
     last_updated: datetime
+    # Rendered prompt section, reset whenever the personality is updated
+    prompt_section: Optional[str] = field(default=None, repr=False, compare=False)
+
+@dataclass
+class ConversationFeatures:
+    """Per-exchange text features, computed once and shared by the learning helpers"""
+    user_message: str
+    agent_response: str
+    user_lower: str
+    user_tokens: List[str]
+    response_lower: str
+    response_tokens: List[str]
+    user_tech_count: int
+    response_tech_count: int
+    user_style: StyleAnalysis
 
 class LearningEngine:
     """Engine for learning from conversations and adapting agent behavior"""
@@ -43,90 +91,118 @@ class LearningEngine:
     def __init__(self, memory_manager: MemoryManager):
         self.memory_manager = memory_manager
         self.style_analyzer = StyleAnalyzer()
-        self.agent_personalities = {}  # Cache for agent personalities
+        # Cache for agent personalities: agent_id -> (personality or None, expiry)
+        self.agent_personalities: Dict[str, Tuple[Optional[AgentPersonality], float]] = {}
         self.learning_patterns = {}    # Cache for learning patterns
+        self._core_tech_re = _compile_terms(CORE_TECH_TERMS)
+        self._tech_re = _compile_terms(TECH_TERMS)
     
     def learn_from_conversation(self, agent_id: str, user_message: str, 
                                agent_response: str, user_id: Optional[str] = None,
                                conversation_context: Optional[Dict] = None):
         """Learn from a single conversation exchange"""
+        self.memory_manager.store_memories_bulk(
+            self.collect_conversation_memories(agent_id, user_message, agent_response, user_id, conversation_context)
+        )
+    
+    def collect_conversation_memories(self, agent_id: str, user_message: str,
+                                      agent_response: str, user_id: Optional[str] = None,
+                                      conversation_context: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """Learn from a conversation exchange and return the memories it produced, unstored,
+        so callers can batch writes across conversations"""
         
         logger.info(f"🧠 Learning from conversation for {agent_id}")
         
-        # Store the conversation in memory
-        self.memory_manager.store_memory(
-            agent_id=agent_id,
-            content=f"User: {user_message}\nAgent: {agent_response}",
-            memory_type='conversation',
-            user_id=user_id,
-            importance=0.7,
-            metadata=conversation_context or {}
-        )
+        features = self._extract_features(user_message, agent_response)
+        
+        # Collect every memory produced by this exchange and write them in one batch
+        pending = [{
+            'agent_id': agent_id,
+            'content': f"User: {user_message}\nAgent: {agent_response}",
+            'memory_type': 'conversation',
+            'user_id': user_id,
+            'importance': 0.7,
+            'metadata': conversation_context or {}
+        }]
         
         # Analyze communication patterns
-        self._analyze_communication_patterns(agent_id, user_message, agent_response, user_id)
+        pending.extend(self._analyze_communication_patterns(agent_id, features, user_id))
         
         # Update agent personality
-        self._update_agent_personality(agent_id, user_message, agent_response, user_id)
+        pending.extend(self._update_agent_personality(agent_id, features, user_id))
         
         # Learn technical preferences
-        self._learn_technical_preferences(agent_id, user_message, agent_response)
+        pending.extend(self._learn_technical_preferences(agent_id, features))
         
-        # Extract and store knowledge
-        self._extract_and_store_knowledge(agent_id, user_message, agent_response)
-    
-    def _analyze_communication_patterns(self, agent_id: str, user_message: str, 
-                                      agent_response: str, user_id: Optional[str]):
-        """Analyze communication patterns from conversation"""
+        # Extract knowledge
+        pending.extend(self._extract_knowledge_memories(agent_id, features))
         
-        # Analyze user's communication style
-        user_style = self.style_analyzer.analyze_style(user_message)
+        return pending
+    
+    def _extract_features(self, user_message: str, agent_response: str) -> ConversationFeatures:
+        """Lower, tokenize and score both sides of the exchange once"""
+        user_lower = user_message.lower()
+        response_lower = agent_response.lower()
+        return ConversationFeatures(
+            user_message=user_message,
+            agent_response=agent_response,
+            user_lower=user_lower,
+            user_tokens=user_lower.split(),
+            response_lower=response_lower,
+            response_tokens=response_lower.split(),
+            user_tech_count=self._count_technical_terms(user_message),
+            response_tech_count=self._count_technical_terms(agent_response),
+            user_style=self.style_analyzer.analyze_style(user_message)
+        )
+    
+    def _analyze_communication_patterns(self, agent_id: str, features: ConversationFeatures,
+                                      user_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Analyze communication patterns from conversation; returns memories to store"""
         
         # Convert StyleAnalysis object to dictionary for JSON serialization
-        user_style_dict = {
-            'formality_score': user_style.formality_score,
-            'technical_depth': user_style.technical_depth,
-            'response_length': user_style.response_length,
-            'communication_tone': user_style.communication_tone,
-            'common_patterns': user_style.common_patterns,
-            'personality_traits': user_style.personality_traits
-        }
+        user_style_dict = asdict(features.user_style)
+        
+        pending = []
         
         # Store user style preferences
         if user_id:
-            self.memory_manager.store_memory(
-                agent_id=agent_id,
-                content=json.dumps(user_style_dict),
-                memory_type='user_style',
-                user_id=user_id,
-                importance=0.8,
-                metadata={'analysis_type': 'communication_style'}
-            )
+            pending.append({
+                'agent_id': agent_id,
+                'content': _json(user_style_dict),
+                'memory_type': 'user_style',
+                'user_id': user_id,
+                'importance': 0.8,
+                'metadata': {'analysis_type': 'communication_style'}
+            })
         
         # Analyze response effectiveness (simplified)
-        response_effectiveness = self._assess_response_effectiveness(user_message, agent_response)
+        response_effectiveness = self._assess_response_effectiveness(features)
         
         # Store response pattern
-        self.memory_manager.store_memory(
-            agent_id=agent_id,
-            content=json.dumps({
+        pending.append({
+            'agent_id': agent_id,
+            'content': _json({
                 'user_style': user_style_dict if user_id else None,
                 'response_effectiveness': response_effectiveness,
-                'response_length': len(agent_response.split()),
-                'technical_terms_used': self._count_technical_terms(agent_response)
+                'response_length': len(features.response_tokens),
+                'technical_terms_used': features.response_tech_count
             }),
-            memory_type='response_pattern',
-            user_id=user_id,
-            importance=0.6
-        )
+            'memory_type': 'response_pattern',
+            'user_id': user_id,
+            'importance': 0.6
+        })
+        
+        return pending
     
-    def _update_agent_personality(self, agent_id: str, user_message: str, 
-                                 agent_response: str, user_id: Optional[str]):
-        """Update agent personality based on conversation"""
+    def _update_agent_personality(self, agent_id: str, features: ConversationFeatures,
+                                 user_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Update agent personality based on conversation; returns memories to store"""
         
         # Get current personality or create new one
-        if agent_id not in self.agent_personalities:
-            self.agent_personalities[agent_id] = AgentPersonality(
+        cached = self.agent_personalities.get(agent_id)
+        personality = cached[0] if cached else None
+        if personality is None:
+            personality = AgentPersonality(
                 agent_id=agent_id,
                 communication_style={},
                 technical_preferences={},
@@ -136,77 +212,93 @@ class LearningEngine:
                 last_updated=datetime.utcnow()
             )
         
-        personality = self.agent_personalities[agent_id]
-        
         # Learn common phrases from user
-        user_phrases = self._extract_common_phrases(user_message)
+        user_phrases = self._extract_common_phrases(features.user_tokens)
         personality.learned_phrases.extend(user_phrases)
         
         # Update communication style
         personality.communication_style = self._update_communication_style(
-            personality.communication_style, user_message, agent_response
+            personality.communication_style, features
         )
         
         # Update technical preferences
         personality.technical_preferences = self._update_technical_preferences(
-            personality.technical_preferences, user_message, agent_response
+            personality.technical_preferences, features
         )
         
         personality.last_updated = datetime.utcnow()
+        personality.prompt_section = None
+        self.agent_personalities[agent_id] = (personality, time.monotonic() + PERSONALITY_CACHE_TTL)
         
         # Store updated personality
-        self.memory_manager.store_memory(
-            agent_id=agent_id,
-            content=json.dumps({
+        return [{
+            'agent_id': agent_id,
+            'content': _json({
                 'communication_style': personality.communication_style,
-                'technical_preferences': personality.technical_preferences,
+                # Only the top terms are persisted; the Counter tail stays in memory
+                'technical_preferences': {
+                    **personality.technical_preferences,
+                    'preferred_terms': dict(Counter(
+                        personality.technical_preferences.get('preferred_terms', {})
+                    ).most_common(TOP_PREFERRED_TERMS))
+                },
                 'learned_phrases': personality.learned_phrases[-10:],  # Last 10 phrases
                 'expertise_areas': personality.expertise_areas
             }),
-            memory_type='personality_update',
-            user_id=user_id,
-            importance=0.9
-        )
+            'memory_type': 'personality_update',
+            'user_id': user_id,
+            'importance': 0.9
+        }]
     
-    def _learn_technical_preferences(self, agent_id: str, user_message: str, agent_response: str):
-        """Learn technical preferences from conversation"""
+    def _learn_technical_preferences(self, agent_id: str,
+                                     features: ConversationFeatures) -> List[Dict[str, Any]]:
+        """Learn technical preferences from conversation; returns memories to store"""
         
         # Extract technical terms and concepts
-        user_tech_terms = self._extract_technical_terms(user_message)
-        response_tech_terms = self._extract_technical_terms(agent_response)
+        user_tech_terms = self._extract_technical_terms(features.user_message)
+        response_tech_terms = self._extract_technical_terms(features.agent_response)
         
         # Store technical learning
-        if user_tech_terms or response_tech_terms:
-            self.memory_manager.store_memory(
-                agent_id=agent_id,
-                content=json.dumps({
-                    'user_tech_terms': user_tech_terms,
-                    'response_tech_terms': response_tech_terms,
-                    'tech_depth': self._assess_technical_depth(user_message, agent_response)
-                }),
-                memory_type='technical_learning',
-                importance=0.8
-            )
+        if not (user_tech_terms or response_tech_terms):
+            return []
+        
+        return [{
+            'agent_id': agent_id,
+            'content': _json({
+                'user_tech_terms': user_tech_terms,
+                'response_tech_terms': response_tech_terms,
+                'tech_depth': self._assess_technical_depth(features)
+            }),
+            'memory_type': 'technical_learning',
+            'importance': 0.8
+        }]
     
-    def _extract_and_store_knowledge(self, agent_id: str, user_message: str, agent_response: str):
-        """Extract and store knowledge from conversation"""
+    def _extract_knowledge_memories(self, agent_id: str,
+                                    features: ConversationFeatures) -> List[Dict[str, Any]]:
+        """Extract knowledge from conversation; returns memories to store"""
         
         # Extract knowledge snippets
-        knowledge_snippets = self._extract_knowledge_snippets(user_message, agent_response)
-        
-        for snippet in knowledge_snippets:
-            self.memory_manager.store_memory(
-                agent_id=agent_id,
-                content=snippet['content'],
-                memory_type='knowledge',
-                importance=snippet['importance'],
-                metadata=snippet['metadata'],
-                tags=snippet['tags']
-            )
+        knowledge_snippets = self._extract_knowledge_snippets(features)
+        
+        return [
+            {
+                'agent_id': agent_id,
+                'content': snippet['content'],
+                'memory_type': 'knowledge',
+                'importance': snippet['importance'],
+                'metadata': snippet['metadata'],
+                'tags': snippet['tags']
+            }
+            for snippet in knowledge_snippets
+        ]
     
     def get_enhanced_system_prompt(self, agent_id: str, base_prompt: str, 
                                  user_id: Optional[str] = None) -> str:
         """Get enhanced system prompt with learned personality"""
+        return base_prompt + self.get_learned_context(agent_id, user_id)
+    
+    def get_learned_context(self, agent_id: str, user_id: Optional[str] = None) -> str:
+        """Learned personality and recent context, without the static base prompt"""
         
         # Get agent personality
         personality = self._get_agent_personality(agent_id)
@@ -214,42 +306,58 @@ class LearningEngine:
         # Get recent context
         context_window = self.memory_manager.get_context_window(agent_id, user_id)
         
-        # Build enhanced prompt
-        enhanced_prompt = base_prompt
+        # Build learned context
+        parts = []
         
         # Add personality traits
         if personality:
-            enhanced_prompt += f"\n\n## Your Learned Personality:\n"
-            enhanced_prompt += f"Communication Style: {json.dumps(personality.communication_style)}\n"
-            enhanced_prompt += f"Technical Preferences: {json.dumps(personality.technical_preferences)}\n"
-            
-            if personality.learned_phrases:
-                enhanced_prompt += f"Common phrases you use: {', '.join(personality.learned_phrases[-5:])}\n"
+            parts.append(self._personality_prompt_section(personality))
         
         # Add recent context
         if context_window.recent_conversations:
-            enhanced_prompt += f"\n\n## Recent Context:\n"
+            parts.append("\n\n## Recent Context:\n")
             for conv in context_window.recent_conversations[:3]:
-                enhanced_prompt += f"- {conv.content[:200]}...\n"
+                parts.append(f"- {conv.content[:200]}...\n")
         
         # Add relevant knowledge
         if context_window.relevant_knowledge:
-            enhanced_prompt += f"\n\n## Relevant Knowledge:\n"
+            parts.append("\n\n## Relevant Knowledge:\n")
             for knowledge in context_window.relevant_knowledge[:2]:
-                enhanced_prompt += f"- {knowledge.content[:200]}...\n"
+                parts.append(f"- {knowledge.content[:200]}...\n")
         
         # Add current topic context
         if context_window.current_topic:
-            enhanced_prompt += f"\n\n## Current Topic: {context_window.current_topic}\n"
+            parts.append(f"\n\n## Current Topic: {context_window.current_topic}\n")
         
-        return enhanced_prompt
+        return "".join(parts)
+    
+    def _personality_prompt_section(self, personality: AgentPersonality) -> str:
+        """Render the personality block of the system prompt, reusing the last rendering"""
+        if personality.prompt_section is None:
+            parts = [
+                "\n\n## Your Learned Personality:\n",
+                f"Communication Style: {_json(personality.communication_style)}\n",
+                f"Technical Preferences: {_json(personality.technical_preferences)}\n"
+            ]
+            if personality.learned_phrases:
+                parts.append(f"Common phrases you use: {', '.join(personality.learned_phrases[-5:])}\n")
+            personality.prompt_section = "".join(parts)
+        return personality.prompt_section
     
     def _get_agent_personality(self, agent_id: str) -> Optional[AgentPersonality]:
-        """Get agent personality from memory"""
+        """Get agent personality, reading through a TTL cache that also remembers misses"""
         
         # Check cache first
-        if agent_id in self.agent_personalities:
-            return self.agent_personalities[agent_id]
+        cached = self.agent_personalities.get(agent_id)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+        
+        personality = self._load_agent_personality(agent_id)
+        self.agent_personalities[agent_id] = (personality, time.monotonic() + PERSONALITY_CACHE_TTL)
+        return personality
+    
+    def _load_agent_personality(self, agent_id: str) -> Optional[AgentPersonality]:
+        """Load the latest agent personality from memory"""
         
         # Load from memory
         personality_memories = self.memory_manager.retrieve_memories(
@@ -260,7 +368,7 @@ class LearningEngine:
         
         if personality_memories:
             try:
-                data = json.loads(personality_memories[0].content)
+                data = orjson.loads(personality_memories[0].content)
                 personality = AgentPersonality(
                     agent_id=agent_id,
                     communication_style=data.get('communication_style', {}),
@@ -270,124 +378,105 @@ class LearningEngine:
                     expertise_areas=data.get('expertise_areas', []),
                     last_updated=personality_memories[0].timestamp
                 )
-                self.agent_personalities[agent_id] = personality
                 return personality
             except Exception as e:
                 logger.error(f"❌ Failed to load personality for {agent_id}: {e}")
         
         return None
     
-    def _assess_response_effectiveness(self, user_message: str, agent_response: str) -> float:
+    def _assess_response_effectiveness(self, features: ConversationFeatures) -> float:
         """Assess how effective the agent response was (simplified)"""
         
         # Simple heuristics for response effectiveness
         score = 0.5  # Base score
         
         # Length appropriateness
-        user_length = len(user_message.split())
-        response_length = len(agent_response.split())
+        user_length = len(features.user_tokens)
+        response_length = len(features.response_tokens)
         
         if 0.5 <= response_length / max(user_length, 1) <= 2.0:
             score += 0.2
         
         # Technical depth match
-        user_tech_terms = self._count_technical_terms(user_message)
-        response_tech_terms = self._count_technical_terms(agent_response)
-        
-        if user_tech_terms > 0 and response_tech_terms > 0:
+        if features.user_tech_count > 0 and features.response_tech_count > 0:
             score += 0.2
         
         # Question answering
-        if '?' in user_message and ('yes' in agent_response.lower() or 'no' in agent_response.lower()):
+        if '?' in features.user_message and ('yes' in features.response_lower or 'no' in features.response_lower):
             score += 0.1
         
         return min(score, 1.0)
     
     def _count_technical_terms(self, text: str) -> int:
-        """Count technical terms in text"""
-        tech_terms = [
-            'api', 'database', 'server', 'client', 'frontend', 'backend',
-            'react', 'node', 'python', 'javascript', 'sql', 'aws', 'cloud',
-            'docker', 'kubernetes', 'microservices', 'architecture'
-        ]
-        
-        text_lower = text.lower()
-        return sum(1 for term in tech_terms if term in text_lower)
+        """Count distinct technical terms in text"""
+        return len({m.group(1).lower() for m in self._core_tech_re.finditer(text)})
     
-    def _extract_common_phrases(self, text: str) -> List[str]:
-        """Extract common phrases from text"""
+    def _extract_common_phrases(self, words: List[str]) -> List[str]:
+        """Extract common phrases from lower-cased tokens"""
         # Simple phrase extraction - in production, use NLP
         phrases = []
         
-        # Extract 2-3 word phrases
-        words = text.lower().split()
-        for i in range(len(words) - 1):
-            phrase = f"{words[i]} {words[i+1]}"
+        # Extract 2-3 word phrases, stopping once the top 5 are found
+        for first, second in zip(words, islice(words, 1, None)):
+            phrase = f"{first} {second}"
             if len(phrase) > 5:  # Filter out very short phrases
                 phrases.append(phrase)
+                if len(phrases) == 5:
+                    break
         
-        return phrases[:5]  # Return top 5 phrases
+        return phrases
     
-    def _update_communication_style(self, current_style: Dict, user_message: str, 
-                                   agent_response: str) -> Dict:
+    def _update_communication_style(self, current_style: Dict,
+                                   features: ConversationFeatures) -> Dict:
         """Update communication style based on conversation"""
         
-        # Analyze formality
-        formality_score = self.style_analyzer._analyze_formality(user_message.lower())
+        # Formality was already scored on the lowered message by analyze_style
+        formality_score = features.user_style.formality_score
         
         # Update style preferences
         if 'formality' not in current_style:
             current_style['formality'] = []
         
-        current_style['formality'].append(formality_score)
+        scores = current_style['formality']
+        scores.append(formality_score)
         
         # Keep only last 10 scores
-        if len(current_style['formality']) > 10:
-            current_style['formality'] = current_style['formality'][-10:]
+        if len(scores) > 10:
+            del scores[:-10]
         
-        # Calculate average
-        current_style['avg_formality'] = np.mean(current_style['formality'])
+        # Calculate average; plain arithmetic beats NumPy dispatch on <= 10 floats
+        current_style['avg_formality'] = sum(scores) / len(scores)
         
         return current_style
     
-    def _update_technical_preferences(self, current_prefs: Dict, user_message: str, 
-                                    agent_response: str) -> Dict:
+    def _update_technical_preferences(self, current_prefs: Dict,
+                                    features: ConversationFeatures) -> Dict:
         """Update technical preferences based on conversation"""
         
         # Extract technical terms
-        tech_terms = self._extract_technical_terms(user_message)
+        tech_terms = self._extract_technical_terms(features.user_message)
         
-        if 'preferred_terms' not in current_prefs:
-            current_prefs['preferred_terms'] = Counter()
+        # Personalities loaded from memory carry a plain dict; update() must add, not replace
+        preferred = current_prefs.get('preferred_terms')
+        if not isinstance(preferred, Counter):
+            preferred = current_prefs['preferred_terms'] = Counter(preferred or {})
         
-        for term in tech_terms:
-            current_prefs['preferred_terms'][term] += 1
+        preferred.update(tech_terms)
         
-        # Keep only top 20 terms
-        current_prefs['preferred_terms'] = Counter(dict(current_prefs['preferred_terms'].most_common(20)))
+        # Prune lazily: let the tail grow to MAX_TRACKED_TERMS before trimming to the top terms
+        if len(preferred) > MAX_TRACKED_TERMS:
+            current_prefs['preferred_terms'] = Counter(dict(preferred.most_common(TOP_PREFERRED_TERMS)))
         
         return current_prefs
     
     def _extract_technical_terms(self, text: str) -> List[str]:
         """Extract technical terms from text"""
-        tech_terms = [
-            'api', 'database', 'server', 'client', 'frontend', 'backend',
-            'react', 'node', 'python', 'javascript', 'sql', 'aws', 'cloud',
-            'docker', 'kubernetes', 'microservices', 'architecture', 'deployment',
-            'scalability', 'performance', 'security', 'authentication', 'authorization'
-        ]
-        
-        text_lower = text.lower()
-        found_terms = [term for term in tech_terms if term in text_lower]
-        
-        return found_terms
+        found = {m.group(1).lower() for m in self._tech_re.finditer(text)}
+        return [term for term in TECH_TERMS if term in found]
     
-    def _assess_technical_depth(self, user_message: str, agent_response: str) -> str:
+    def _assess_technical_depth(self, features: ConversationFeatures) -> str:
         """Assess technical depth of conversation"""
-        user_tech_count = self._count_technical_terms(user_message)
-        response_tech_count = self._count_technical_terms(agent_response)
-        
-        total_tech_terms = user_tech_count + response_tech_count
+        total_tech_terms = features.user_tech_count + features.response_tech_count
         
         if total_tech_terms >= 5:
             return 'high'
@@ -396,36 +485,35 @@ class LearningEngine:
         else:
             return 'low'
     
-    def _extract_knowledge_snippets(self, user_message: str, agent_response: str) -> List[Dict]:
+    def _extract_knowledge_snippets(self, features: ConversationFeatures) -> List[Dict]:
         """Extract knowledge snippets from conversation"""
+        agent_response = features.agent_response
         snippets = []
         
-        # Look for code snippets
-        code_pattern = r'```[\s\S]*?```'
-        code_matches = re.findall(code_pattern, agent_response)
+        # Only scan the leading window of very large responses
+        scan_text = agent_response if len(agent_response) < MAX_ANALYZE_LEN else agent_response[:MAX_ANALYZE_LEN]
         
-        for code in code_matches:
+        # Look for code snippets
+        for match in islice(CODE_BLOCK_PATTERN.finditer(scan_text), MAX_KNOWLEDGE_SNIPPETS):
             snippets.append({
-                'content': code,
+                'content': match.group(0),
                 'importance': 0.9,
                 'metadata': {'type': 'code_snippet'},
                 'tags': ['code', 'technical']
             })
         
         # Look for URLs/links
-        url_pattern = r'https?://[^\s]+'
-        url_matches = re.findall(url_pattern, agent_response)
-        
-        for url in url_matches:
+        remaining = MAX_KNOWLEDGE_SNIPPETS - len(snippets)
+        for match in islice(URL_PATTERN.finditer(scan_text), max(remaining, 0)):
             snippets.append({
-                'content': url,
+                'content': match.group(0),
                 'importance': 0.7,
                 'metadata': {'type': 'reference_url'},
                 'tags': ['reference', 'external']
             })
         
         # Look for technical explanations (simplified)
-        if len(agent_response.split()) > 50:  # Substantial response
+        if len(features.response_tokens) > 50:  # Substantial response
             snippets.append({
                 'content': agent_response[:500] + '...',
                 'importance': 0.6,
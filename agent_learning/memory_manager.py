@@ -3,19 +3,113 @@ Enhanced Memory Manager for AI Agent Twins
 Handles persistent memory, context awareness, and knowledge retrieval
 """
 
-import json
-import uuid
+import atexit
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import count
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple, Union
+from dataclasses import dataclass, field
 import logging
 import boto3
+import orjson
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# DynamoDB write-behind settings (BatchWriteItem accepts at most 25 items per request)
+WRITE_BATCH_SIZE = 25
+WRITE_FLUSH_INTERVAL = 0.2  # seconds to wait for a batch to fill
+WRITE_QUEUE_SIZE = 10_000
+WRITE_MAX_RETRIES = 5
+
+MAX_LOCAL_MEMORIES = 1000  # per agent
+MEMORY_TTL_SECONDS = 365 * 24 * 3600
+
+RAG_MODEL_ARN = "arn:aws:bedrock:us-east-1::foundation-model/anthropic.claude-3-5-sonnet-20241022-v2:0"
+
+# get_context_window: knowledge importance cut-off, and read-ahead for the fused DynamoDB query
+CONTEXT_KNOWLEDGE_THRESHOLD = 0.7
+CONTEXT_QUERY_FUDGE = 4
+CONTEXT_QUERY_MAX_PAGES = 3
+RETRIEVE_MAX_PAGES = 5  # bound on pages read to fill one retrieve_memories call
+
+# GSI with agent_id (HASH) and mtype_imp = "<memory_type>#<importance percent, 000-100>" (RANGE)
+MEMORY_TYPE_INDEX = 'agent_id-mtype_imp-index'
+
+def _mtype_imp(memory_type: str, importance: float) -> str:
+    """Composite range key so memory type and importance can be matched in the key condition"""
+    return f"{memory_type}#{min(max(int(importance * 100), 0), 100):03d}"
+
+# Timestamps are naive UTC; DynamoDB stores them as integer epoch microseconds ('ts_us')
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def _to_epoch_us(timestamp: datetime) -> int:
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+def _from_epoch_us(ts_us) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(ts_us))
+
+@lru_cache(maxsize=1024, typed=True)
+def _to_decimal(value: float) -> Decimal:
+    """DynamoDB number for a float; importance values repeat, so conversions are cached"""
+    return Decimal(str(value))
+
+@lru_cache(maxsize=4)
+def _day_string(epoch_day: int) -> str:
+    """YYYYMMDD for a UTC day number, formatted once per day"""
+    return (_EPOCH + timedelta(days=epoch_day)).strftime('%Y%m%d')
+
+# Shared by every MemoryManager: pooled keep-alive connections and adaptive retries
+_BOTO_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    connect_timeout=1,
+    read_timeout=3
+)
+# retrieve_and_generate runs a model, so it needs a longer read timeout
+_BEDROCK_CONFIG = _BOTO_CONFIG.merge(Config(read_timeout=60))
+
+# Runs independent remote retrievals side by side (boto3 clients are thread-safe)
+_RETRIEVAL_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="memory-retrieval")
+
+@lru_cache(maxsize=None)
+def _bedrock_agent_client():
+    return boto3.client('bedrock-agent-runtime', config=_BEDROCK_CONFIG)
+
+@lru_cache(maxsize=None)
+def _dynamodb_resource():
+    return boto3.resource('dynamodb', config=_BOTO_CONFIG)
+
+def _new_id() -> str:
+    """Random 128-bit id as hex; ids are opaque, so the UUID object and dashes are skipped"""
+    return os.urandom(16).hex()
+
+def _interned(values: Optional[List[str]]) -> List[str]:
+    """Intern tag strings so repeated tags share one object across entries"""
+    return [sys.intern(value) for value in values] if values else []
+
+# Topic keywords in priority order, scanned in one case-insensitive pass
+TOPIC_KEYWORDS = ('mobile', 'database', 'ai', 'cloud', 'frontend', 'backend')
+TOPIC_PATTERN = re.compile(f"(?=({'|'.join(TOPIC_KEYWORDS)}))", re.IGNORECASE)
+
+def _trigrams(text: str) -> set:
+    """Distinct 3-character substrings of already-lowercased text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+# Slotted: the local filters read memory_type/user_id/importance/timestamp on every entry
+@dataclass(slots=True)
 class MemoryEntry:
     """Individual memory entry with metadata"""
     id: str
@@ -36,12 +130,68 @@ class ContextWindow:
     user_preferences: Dict[str, Any]
     current_topic: Optional[str]
 
+@dataclass(frozen=True)
+class _ImportanceUpdate:
+    """Queued importance change for a stored memory"""
+    memory_id: str
+    agent_id: str
+    memory_type: str
+    importance: float
+
+@dataclass
+class _AgentMemories:
+    """Local memories for one agent, newest first, with per-type and per-user views"""
+    all: deque = field(default_factory=deque)
+    by_type: Dict[str, deque] = field(default_factory=lambda: defaultdict(deque))
+    by_user: Dict[Optional[str], deque] = field(default_factory=lambda: defaultdict(deque))
+    
+    def add(self, entry: MemoryEntry):
+        self.all.appendleft(entry)
+        self.by_type[entry.memory_type].appendleft(entry)
+        self.by_user[entry.user_id].appendleft(entry)
+    
+    def pop_oldest(self) -> MemoryEntry:
+        # The oldest entry is also the oldest in its type and user views
+        entry = self.all.pop()
+        for views, key in ((self.by_type, entry.memory_type), (self.by_user, entry.user_id)):
+            view = views[key]
+            view.pop()
+            if not view:
+                del views[key]
+        return entry
+
 class MemoryManager:
     """Enhanced memory management for AI agents"""
     
-    def __init__(self, use_aws_memory: bool = True):
+    def __init__(self, use_aws_memory: bool = True, read_cache_ttl: float = 30,
+                 read_cache_size: int = 4096):
         self.use_aws_memory = use_aws_memory
-        self.local_memories = {}  # Fallback for local development
+        self.local_memories: Dict[str, _AgentMemories] = {}  # Fallback for local development
+        self.use_type_index = True  # cleared if the table has no MEMORY_TYPE_INDEX
+        self._rag_configurations: Dict[int, Dict[str, Any]] = {}  # shared, never mutated
+        
+        # Trigram index over local memories: agent_id -> trigram -> memory ids.
+        # Any entry containing the query has every trigram of the query.
+        self._trigram_index: Dict[str, Dict[str, set]] = {}
+        self._local_by_id: Dict[str, Dict[str, Tuple[int, MemoryEntry]]] = {}
+        self._local_seq = count()
+        # Guards local_memories and the trigram/id indexes, which the flusher thread and
+        # asyncio.to_thread workers write while other threads read them
+        self._local_lock = threading.Lock()
+        
+        # TTL + LRU cache of remote reads, keyed on the retrieve_memories arguments
+        self.read_cache_ttl = read_cache_ttl
+        self.read_cache_size = read_cache_size
+        self._read_cache: "OrderedDict[Tuple, Tuple[List[MemoryEntry], float]]" = OrderedDict()
+        self._read_cache_lock = threading.Lock()
+        
+        # DynamoDB writes are queued and flushed in batches by a background thread
+        self._write_queue: "queue.Queue[Union[MemoryEntry, _ImportanceUpdate]]" = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_lock = threading.Lock()
+        self._closing = threading.Event()
+        # close() is a no-op until a flusher has started, so one registration covers restarts
+        atexit.register(self.close)
         
         if use_aws_memory:
             self._setup_aws_memory()
@@ -50,7 +200,7 @@ class MemoryManager:
         """Setup AWS Bedrock Memory or DynamoDB for persistent storage"""
         try:
             # Try AWS Bedrock Memory first
-            self.bedrock_client = boto3.client('bedrock-agent-runtime')
+            self.bedrock_client = _bedrock_agent_client()
             self.memory_id = "agent_memory-b4w8CzCsaH"  # Your specific memory ID
             # Temporarily disable Bedrock Memory due to API complexity
             self.use_bedrock_memory = False
@@ -61,7 +211,7 @@ class MemoryManager:
         
         # Always setup DynamoDB as fallback
         try:
-            self.dynamodb = boto3.resource('dynamodb')
+            self.dynamodb = _dynamodb_resource()
             self.memory_table = self.dynamodb.Table('agent-memories')
             logger.info("✅ DynamoDB fallback initialized")
         except Exception as e:
@@ -72,19 +222,7 @@ class MemoryManager:
                     user_id: Optional[str] = None, importance: float = 0.5,
                     metadata: Optional[Dict] = None, tags: Optional[List[str]] = None) -> str:
         """Store a memory entry"""
-        memory_id = str(uuid.uuid4())
-        
-        entry = MemoryEntry(
-            id=memory_id,
-            agent_id=agent_id,
-            user_id=user_id,
-            content=content,
-            memory_type=memory_type,
-            importance=importance,
-            timestamp=datetime.utcnow(),
-            metadata=metadata or {},
-            tags=tags or []
-        )
+        entry = self._build_entry(agent_id, content, memory_type, user_id, importance, metadata, tags)
         
         if self.use_aws_memory and self.use_bedrock_memory:
             self._store_in_bedrock_memory(entry)
@@ -93,8 +231,46 @@ class MemoryManager:
         else:
             self._store_locally(entry)
         
+        self._invalidate_reads(agent_id)
         logger.info(f"💾 Stored memory for {agent_id}: {memory_type}")
-        return memory_id
+        return entry.id
+    
+    def store_memories_bulk(self, memories: List[Dict[str, Any]]) -> List[str]:
+        """Store several memory entries in one batch.
+        Each dict takes the same keyword arguments as store_memory; order is preserved."""
+        entries = [self._build_entry(**memory) for memory in memories]
+        if not entries:
+            return []
+        
+        if self.use_aws_memory and self.use_bedrock_memory:
+            for entry in entries:
+                self._store_in_bedrock_memory(entry)
+        elif self.use_aws_memory:
+            self._store_batch_in_dynamodb(entries)
+        else:
+            for entry in entries:
+                self._store_locally(entry)
+        
+        for agent_id in {entry.agent_id for entry in entries}:
+            self._invalidate_reads(agent_id)
+        logger.info(f"💾 Stored {len(entries)} memories in bulk")
+        return [entry.id for entry in entries]
+    
+    def _build_entry(self, agent_id: str, content: str, memory_type: str,
+                     user_id: Optional[str] = None, importance: float = 0.5,
+                     metadata: Optional[Dict] = None, tags: Optional[List[str]] = None) -> MemoryEntry:
+        """Create a new memory entry with a fresh id and timestamp"""
+        return MemoryEntry(
+            id=_new_id(),
+            agent_id=agent_id,
+            user_id=user_id,
+            content=content,
+            memory_type=sys.intern(memory_type),
+            importance=importance,
+            timestamp=datetime.utcnow(),
+            metadata=metadata or {},
+            tags=_interned(tags)
+        )
     
     def _store_in_bedrock_memory(self, entry: MemoryEntry):
         """Store in AWS Bedrock Memory"""
@@ -115,7 +291,7 @@ class MemoryManager:
             
             # Use agent_id as actor_id and create session_id
             actor_id = entry.agent_id
-            session_id = f"session_{entry.user_id or 'default'}_{entry.timestamp.strftime('%Y%m%d')}"
+            session_id = f"session_{entry.user_id or 'default'}_{_day_string((entry.timestamp - _EPOCH).days)}"
             
             params = {
                 "memoryId": self.memory_id,
@@ -123,7 +299,7 @@ class MemoryManager:
                 "sessionId": session_id,
                 "eventTimestamp": event_timestamp,
                 "payload": payload,
-                "clientToken": str(uuid.uuid4()),
+                "clientToken": _new_id(),
             }
             
             response = self.bedrock_client.create_event(**params)
@@ -144,43 +320,232 @@ class MemoryManager:
                 self._store_locally(entry)
                 return
             
-            self.memory_table.put_item(Item={
-                'memory_id': entry.id,
-                'agent_id': entry.agent_id,
-                'user_id': entry.user_id or 'anonymous',
-                'content': entry.content,
-                'memory_type': entry.memory_type,
-                'importance': Decimal(str(entry.importance)),  # Convert float to Decimal
-                'timestamp': entry.timestamp.isoformat(),
-                'metadata': json.dumps(entry.metadata),
-                'tags': entry.tags,
-                'ttl': int((datetime.utcnow() + timedelta(days=365)).timestamp())
-            })
+            self._enqueue_write(entry)
         except ClientError as e:
             logger.error(f"❌ DynamoDB storage failed: {e}")
             self._store_locally(entry)
     
-    def _store_locally(self, entry: MemoryEntry):
-        """Store locally for development"""
-        if entry.agent_id not in self.local_memories:
-            self.local_memories[entry.agent_id] = []
+    def _store_batch_in_dynamodb(self, entries: List[MemoryEntry]):
+        """Queue several entries for the batched DynamoDB writer"""
+        if self.memory_table is None:
+            logger.warning("⚠️ DynamoDB table not available, falling back to local storage")
+            for entry in entries:
+                self._store_locally(entry)
+            return
+        
+        for entry in entries:
+            self._store_in_dynamodb(entry)
+    
+    def _enqueue_write(self, entry: MemoryEntry):
+        """Hand an entry to the background writer, writing inline if the queue is full"""
+        self._ensure_flusher()
+        try:
+            self._write_queue.put_nowait(entry)
+        except queue.Full:
+            logger.warning("⚠️ DynamoDB write queue full, writing inline")
+            self.memory_table.put_item(Item=self._to_dynamodb_item(entry))
+    
+    def _ensure_flusher(self):
+        """Start the background writer thread on first use"""
+        with self._flusher_lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._closing.clear()
+                self._flusher = threading.Thread(
+                    target=self._flush_loop, name="memory-flusher", daemon=True
+                )
+                self._flusher.start()
+    
+    def _flush_loop(self):
+        """Drain the write queue in batches of up to WRITE_BATCH_SIZE items"""
+        while not (self._closing.is_set() and self._write_queue.empty()):
+            try:
+                batch = [self._write_queue.get(timeout=WRITE_FLUSH_INTERVAL)]
+            except queue.Empty:
+                continue
+            
+            deadline = time.monotonic() + WRITE_FLUSH_INTERVAL
+            while len(batch) < WRITE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._write_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                # New entries go out as one BatchWriteItem; importance changes are conditional updates
+                entries = [item for item in batch if isinstance(item, MemoryEntry)]
+                if entries:
+                    self._write_batch(entries)
+                for item in batch:
+                    if isinstance(item, _ImportanceUpdate):
+                        self._apply_importance_update(item)
+            except Exception as e:
+                # Keep the writer alive; one bad batch must not stall every later write
+                logger.error(f"❌ DynamoDB background write failed: {e}")
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    def _write_batch(self, entries: List[MemoryEntry]):
+        """Write one batch with BatchWriteItem, backing off on throttling"""
+        # Encode once; throttled retries resend the same items
+        items = [self._to_dynamodb_item(entry) for entry in entries]
+        for attempt in range(WRITE_MAX_RETRIES + 1):
+            try:
+                # batch_writer resends UnprocessedItems itself
+                with self.memory_table.batch_writer(overwrite_by_pkeys=['memory_id', 'agent_id']) as batch:
+                    for item in items:
+                        batch.put_item(Item=item)
+                break
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code')
+                if code in ('ProvisionedThroughputExceededException', 'ThrottlingException') \
+                        and attempt < WRITE_MAX_RETRIES:
+                    time.sleep(min(0.1 * 2 ** attempt, 5.0))
+                    continue
+                logger.error(f"❌ DynamoDB batch storage failed: {e}")
+                for entry in entries:
+                    self._store_locally(entry)
+                break
         
-        self.local_memories[entry.agent_id].append(entry)
+        # Reads cached while these entries were queued are now stale
+        for agent_id in {entry.agent_id for entry in entries}:
+            self._invalidate_reads(agent_id)
+    
+    def _apply_importance_update(self, update: _ImportanceUpdate):
+        """Write an importance change, skipping it when the stored value already matches"""
+        try:
+            # The memory-type index bucket moves with the importance in the same write
+            self.memory_table.update_item(
+                Key={'memory_id': update.memory_id, 'agent_id': update.agent_id},
+                UpdateExpression='SET importance = :importance, mtype_imp = :mtype_imp',
+                ConditionExpression='attribute_not_exists(importance) OR importance <> :importance',
+                ExpressionAttributeValues={
+                    ':importance': _to_decimal(update.importance),
+                    ':mtype_imp': _mtype_imp(update.memory_type, update.importance)
+                }
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                logger.error(f"❌ Failed to update memory importance: {e}")
+            return
         
-        # Keep only last 1000 entries per agent
-        if len(self.local_memories[entry.agent_id]) > 1000:
-            self.local_memories[entry.agent_id] = self.local_memories[entry.agent_id][-1000:]
+        self._invalidate_reads(update.agent_id)
+    
+    def flush(self):
+        """Block until every queued DynamoDB write has been attempted"""
+        if self._flusher is not None and self._flusher.is_alive():
+            self._write_queue.join()
+    
+    def close(self):
+        """Flush pending writes and stop the background writer"""
+        if self._flusher is None:
+            return
+        self._closing.set()
+        self._flusher.join()
+        self._flusher = None
+    
+    def _to_dynamodb_item(self, entry: MemoryEntry) -> Dict[str, Any]:
+        """Convert a memory entry to a DynamoDB item"""
+        return {
+            'memory_id': entry.id,
+            'agent_id': entry.agent_id,
+            'user_id': entry.user_id or 'anonymous',
+            'content': entry.content,
+            'memory_type': entry.memory_type,
+            'importance': _to_decimal(entry.importance),  # Convert float to Decimal
+            'mtype_imp': _mtype_imp(entry.memory_type, entry.importance),
+            'ts_us': _to_epoch_us(entry.timestamp),
+            # OPT_NON_STR_KEYS keeps json.dumps' handling of int/float keys
+            'metadata': orjson.dumps(entry.metadata, option=orjson.OPT_NON_STR_KEYS).decode(),
+            'tags': entry.tags,
+            'ttl': int(time.time()) + MEMORY_TTL_SECONDS
+        }
+    
+    def _store_locally(self, entry: MemoryEntry):
+        """Store locally for development"""
+        with self._local_lock:
+            if entry.agent_id not in self.local_memories:
+                self.local_memories[entry.agent_id] = _AgentMemories()
+            
+            memories = self.local_memories[entry.agent_id]
+            memories.add(entry)
+            self._index_entry(entry)
+            
+            # Keep only last 1000 entries per agent
+            while len(memories.all) > MAX_LOCAL_MEMORIES:
+                self._unindex_entry(memories.pop_oldest())
+    
+    def _index_entry(self, entry: MemoryEntry):
+        """Add a local entry to the search index; caller holds _local_lock"""
+        index = self._trigram_index.setdefault(entry.agent_id, defaultdict(set))
+        for trigram in _trigrams(entry.content.lower()):
+            index[trigram].add(entry.id)
+        self._local_by_id.setdefault(entry.agent_id, {})[entry.id] = (next(self._local_seq), entry)
+    
+    def _unindex_entry(self, entry: MemoryEntry):
+        """Remove a local entry from the search index; caller holds _local_lock"""
+        index = self._trigram_index.get(entry.agent_id)
+        if index is not None:
+            for trigram in _trigrams(entry.content.lower()):
+                postings = index.get(trigram)
+                if postings is not None:
+                    postings.discard(entry.id)
+                    if not postings:
+                        del index[trigram]
+        self._local_by_id.get(entry.agent_id, {}).pop(entry.id, None)
     
     def retrieve_memories(self, agent_id: str, memory_type: Optional[str] = None,
                          user_id: Optional[str] = None, limit: int = 50,
                          importance_threshold: float = 0.0) -> List[MemoryEntry]:
         """Retrieve memories for an agent"""
-        if self.use_aws_memory and self.use_bedrock_memory:
-            return self._retrieve_from_bedrock_memory(agent_id, memory_type, user_id, limit, importance_threshold)
-        elif self.use_aws_memory:
-            return self._retrieve_from_dynamodb(agent_id, memory_type, user_id, limit, importance_threshold)
-        else:
+        if not self.use_aws_memory:
             return self._retrieve_locally(agent_id, memory_type, user_id, limit, importance_threshold)
+        
+        # Remote reads go through the in-process cache first
+        cache_key = (agent_id, memory_type, user_id, limit, importance_threshold)
+        memories = self._get_cached_read(cache_key)
+        if memories is None:
+            if self.use_bedrock_memory:
+                memories = self._retrieve_from_bedrock_memory(agent_id, memory_type, user_id, limit, importance_threshold)
+            else:
+                memories = self._retrieve_from_dynamodb(agent_id, memory_type, user_id, limit, importance_threshold)
+            self._cache_read(cache_key, memories)
+        
+        # Callers get their own list; the cached one is shared
+        return list(memories)
+    
+    def _get_cached_read(self, cache_key: Tuple) -> Optional[List[MemoryEntry]]:
+        """Return a cached retrieval result, or None on miss/expiry"""
+        with self._read_cache_lock:
+            cached = self._read_cache.get(cache_key)
+            if cached is None:
+                return None
+            memories, expires_at = cached
+            if time.monotonic() >= expires_at:
+                del self._read_cache[cache_key]
+                return None
+            self._read_cache.move_to_end(cache_key)
+            return memories
+    
+    def _cache_read(self, cache_key: Tuple, memories: List[MemoryEntry]):
+        """Cache a retrieval result, evicting the least recently used entry when full"""
+        if self.read_cache_ttl <= 0 or self.read_cache_size <= 0:
+            return
+        with self._read_cache_lock:
+            self._read_cache[cache_key] = (memories, time.monotonic() + self.read_cache_ttl)
+            self._read_cache.move_to_end(cache_key)
+            while len(self._read_cache) > self.read_cache_size:
+                self._read_cache.popitem(last=False)
+    
+    def _invalidate_reads(self, agent_id: str):
+        """Drop cached retrievals for an agent after its memories change"""
+        with self._read_cache_lock:
+            stale = [key for key in self._read_cache if key[0] == agent_id]
+            for key in stale:
+                del self._read_cache[key]
     
     def _retrieve_from_bedrock_memory(self, agent_id: str, memory_type: Optional[str],
                                      user_id: Optional[str], limit: int, importance_threshold: float) -> List[MemoryEntry]:
@@ -188,7 +553,7 @@ class MemoryManager:
         try:
             # For now, Bedrock Memory doesn't have a direct retrieve API for our use case
             # We'll use the retrieve_and_generate API with a simple query
-            session_id = f"session_{user_id or 'default'}_{datetime.utcnow().strftime('%Y%m%d')}"
+            session_id = f"session_{user_id or 'default'}_{_day_string(int(time.time()) // 86400)}"
             
             # Create a simple query to retrieve memories
             query = f"agent_id:{agent_id}"
@@ -201,18 +566,7 @@ class MemoryManager:
                 "input": {
                     "text": query
                 },
-                "retrieveAndGenerateConfiguration": {
-                    "type": "KNOWLEDGE_BASE",
-                    "knowledgeBaseConfiguration": {
-                        "knowledgeBaseId": self.memory_id,
-                        "modelArn": "arn:aws:bedrock:us-east-1::foundation-model/anthropic.claude-3-5-sonnet-20241022-v2:0",
-                        "retrievalConfiguration": {
-                            "vectorSearchConfiguration": {
-                                "numberOfResults": limit
-                            }
-                        }
-                    }
-                },
+                "retrieveAndGenerateConfiguration": self._rag_configuration(limit),
                 "sessionId": session_id
             }
             
@@ -227,27 +581,33 @@ class MemoryManager:
                     
                     # Try to parse the content as JSON to extract our memory data
                     try:
-                        memory_data = json.loads(content)
-                        entry = MemoryEntry(
-                            id=str(uuid.uuid4()),
+                        memory_data = orjson.loads(content)
+                        entry_type = memory_data.get("memory_type", "conversation")
+                        entry_importance = memory_data.get("importance", 0.5)
+                        
+                        # Filter by importance threshold and memory type before building the entry
+                        if (entry_importance < importance_threshold or
+                                (memory_type is not None and entry_type != memory_type)):
+                            continue
+                        
+                        # Payloads without a timestamp (or with null) are stamped now, without an ISO round trip
+                        timestamp = memory_data.get("timestamp")
+                        memories.append(MemoryEntry(
+                            id=_new_id(),
                             agent_id=memory_data.get("agent_id", agent_id),
                             user_id=memory_data.get("user_id"),
                             content=memory_data.get("content", content),
-                            memory_type=memory_data.get("memory_type", "conversation"),
-                            importance=memory_data.get("importance", 0.5),
-                            timestamp=datetime.fromisoformat(memory_data.get("timestamp", datetime.utcnow().isoformat())),
+                            memory_type=sys.intern(entry_type),
+                            importance=entry_importance,
+                            timestamp=(datetime.fromisoformat(timestamp) if timestamp
+                                       else datetime.utcnow()),
                             metadata=memory_data.get("metadata", {}),
-                            tags=memory_data.get("tags", [])
-                        )
-                        
-                        # Filter by importance threshold and memory type
-                        if (entry.importance >= importance_threshold and 
-                            (memory_type is None or entry.memory_type == memory_type)):
-                            memories.append(entry)
-                    except json.JSONDecodeError:
+                            tags=_interned(memory_data.get("tags"))
+                        ))
+                    except orjson.JSONDecodeError:
                         # If content is not JSON, create a simple memory entry
                         entry = MemoryEntry(
-                            id=str(uuid.uuid4()),
+                            id=_new_id(),
                             agent_id=agent_id,
                             user_id=user_id,
                             content=content,
@@ -258,6 +618,12 @@ class MemoryManager:
                             tags=[]
                         )
                         memories.append(entry)
+                    
+                    # Stop materializing entries once the limit is reached
+                    if len(memories) >= limit:
+                        break
+                if len(memories) >= limit:
+                    break
             
             logger.info(f"✅ Retrieved {len(memories)} memories from Bedrock")
             return memories[:limit]
@@ -267,6 +633,25 @@ class MemoryManager:
             # Fallback to DynamoDB
             return self._retrieve_from_dynamodb(agent_id, memory_type, user_id, limit, importance_threshold)
     
+    def _rag_configuration(self, limit: int) -> Dict[str, Any]:
+        """retrieveAndGenerateConfiguration for a result count, built once per distinct limit"""
+        config = self._rag_configurations.get(limit)
+        if config is None:
+            config = {
+                "type": "KNOWLEDGE_BASE",
+                "knowledgeBaseConfiguration": {
+                    "knowledgeBaseId": self.memory_id,
+                    "modelArn": RAG_MODEL_ARN,
+                    "retrievalConfiguration": {
+                        "vectorSearchConfiguration": {
+                            "numberOfResults": limit
+                        }
+                    }
+                }
+            }
+            self._rag_configurations[limit] = config
+        return config
+    
     def _retrieve_from_dynamodb(self, agent_id: str, memory_type: Optional[str],
                                user_id: Optional[str], limit: int, importance_threshold: float) -> List[MemoryEntry]:
         """Retrieve from DynamoDB"""
@@ -275,50 +660,114 @@ class MemoryManager:
                 logger.warning("⚠️ DynamoDB table not available, falling back to local storage")
                 return self._retrieve_locally(agent_id, memory_type, user_id, limit, importance_threshold)
             
-            # Query by agent_id
-            response = self.memory_table.query(
-                KeyConditionExpression='agent_id = :agent_id',
-                FilterExpression='importance >= :threshold',
-                ExpressionAttributeValues={
-                    ':agent_id': agent_id, 
-                    ':threshold': Decimal(str(importance_threshold))  # Convert float to Decimal
-                },
-                Limit=limit,
-                ScanIndexForward=False  # Most recent first
-            )
+            # The type index returns the most important entries first, so it only serves
+            # importance-threshold reads; latest-N reads stay on the recency-ordered table
+            items = None
+            if memory_type and importance_threshold > 0 and self.use_type_index:
+                items = self._query_type_index(agent_id, memory_type, limit, importance_threshold)
             
-            memories = []
-            for item in response['Items']:
-                entry = MemoryEntry(
-                    id=item['memory_id'],
-                    agent_id=item['agent_id'],
-                    user_id=item.get('user_id'),
-                    content=item['content'],
-                    memory_type=item['memory_type'],
-                    importance=item['importance'],
-                    timestamp=datetime.fromisoformat(item['timestamp']),
-                    metadata=json.loads(item.get('metadata', '{}')),
-                    tags=item.get('tags', [])
+            if items is None:
+                # Query by agent_id
+                filter_expression = 'importance >= :threshold'
+                values = {
+                    ':agent_id': agent_id, 
+                    ':threshold': _to_decimal(importance_threshold)  # Convert float to Decimal
+                }
+                if memory_type:
+                    filter_expression += ' AND memory_type = :memory_type'
+                    values[':memory_type'] = memory_type
+                items = self._query_until(limit,
+                    KeyConditionExpression='agent_id = :agent_id',
+                    FilterExpression=filter_expression,
+                    ExpressionAttributeValues=values,
+                    ScanIndexForward=False  # Most recent first
                 )
-                memories.append(entry)
             
-            return memories
+            return [self._from_dynamodb_item(item) for item in items]
             
         except ClientError as e:
             logger.error(f"❌ DynamoDB retrieval failed: {e}")
             return self._retrieve_locally(agent_id, memory_type, user_id, limit, importance_threshold)
     
+    def _from_dynamodb_item(self, item: Dict[str, Any]) -> MemoryEntry:
+        """Convert a DynamoDB item to a memory entry"""
+        return MemoryEntry(
+            id=item['memory_id'],
+            agent_id=item['agent_id'],
+            user_id=item.get('user_id'),
+            content=item['content'],
+            memory_type=sys.intern(item['memory_type']),
+            importance=item['importance'],
+            # Items written before ts_us carry an ISO string instead
+            timestamp=(_from_epoch_us(item['ts_us']) if 'ts_us' in item
+                       else datetime.fromisoformat(item['timestamp'])),
+            metadata=orjson.loads(item.get('metadata') or '{}'),
+            tags=_interned(item.get('tags'))
+        )
+    
+    def _query_until(self, limit: int, **query) -> List[Dict[str, Any]]:
+        """Run a query page by page until `limit` items pass the filter or the results run out.
+        Limit is applied before FilterExpression, so a single page can come back short."""
+        items: List[Dict[str, Any]] = []
+        if limit <= 0:
+            return items
+        query['Limit'] = max(limit, min(limit * 8, 100))
+        for _ in range(RETRIEVE_MAX_PAGES):
+            response = self.memory_table.query(**query)
+            items.extend(response['Items'])
+            if len(items) >= limit or 'LastEvaluatedKey' not in response:
+                break
+            query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return items[:limit]
+    
+    def _query_type_index(self, agent_id: str, memory_type: str, limit: int,
+                          importance_threshold: float) -> Optional[List[Dict[str, Any]]]:
+        """Query the memory-type GSI so type and importance bucket are matched server-side.
+        Results are ordered by importance, not recency. Returns None when the index is unavailable."""
+        try:
+            # The key range covers whole importance buckets; the filter trims the lowest one
+            return self._query_until(limit,
+                IndexName=MEMORY_TYPE_INDEX,
+                KeyConditionExpression='agent_id = :agent_id AND mtype_imp BETWEEN :low AND :high',
+                FilterExpression='importance >= :threshold',
+                ExpressionAttributeValues={
+                    ':agent_id': agent_id,
+                    ':low': _mtype_imp(memory_type, importance_threshold),
+                    ':high': _mtype_imp(memory_type, 1.0),
+                    ':threshold': _to_decimal(importance_threshold)
+                },
+                ScanIndexForward=False  # Most important first
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ValidationException':
+                raise
+            logger.warning(f"⚠️ {MEMORY_TYPE_INDEX} not available, filtering on the base table: {e}")
+            self.use_type_index = False
+            return None
+    
     def _retrieve_locally(self, agent_id: str, memory_type: Optional[str],
                          user_id: Optional[str], limit: int, importance_threshold: float) -> List[MemoryEntry]:
         """Retrieve from local storage"""
-        if agent_id not in self.local_memories:
+        if limit <= 0:
             return []
         
-        memories = self.local_memories[agent_id]
+        with self._local_lock:
+            memories = self.local_memories.get(agent_id)
+            if memories is None:
+                return []
+            
+            # Walk the most selective newest-first view; no sort needed. The deques are
+            # mutated by other threads, so filter a snapshot taken under the lock
+            views = [memories.all]
+            if memory_type:
+                views.append(memories.by_type.get(memory_type, ()))
+            if user_id:
+                views.append(memories.by_user.get(user_id, ()))
+            source = list(min(views, key=len))
         
-        # Filter by criteria
+        # Filter by criteria, stopping once the limit is reached
         filtered = []
-        for memory in memories:
+        for memory in source:
             if memory_type and memory.memory_type != memory_type:
                 continue
             if user_id and memory.user_id != user_id:
@@ -326,34 +775,58 @@ class MemoryManager:
             if memory.importance < importance_threshold:
                 continue
             filtered.append(memory)
-        
-        # Sort by timestamp (most recent first) and limit
-        filtered.sort(key=lambda x: x.timestamp, reverse=True)
-        return filtered[:limit]
+            if len(filtered) == limit:
+                break
+        return filtered
     
     def get_context_window(self, agent_id: str, user_id: Optional[str] = None,
                           conversation_limit: int = 10, knowledge_limit: int = 5) -> ContextWindow:
         """Get context window for agent conversation"""
         
-        # Get recent conversations
-        recent_conversations = self.retrieve_memories(
-            agent_id=agent_id,
-            memory_type='conversation',
-            user_id=user_id,
-            limit=conversation_limit
-        )
-        
-        # Get relevant knowledge
-        relevant_knowledge = self.retrieve_memories(
-            agent_id=agent_id,
-            memory_type='knowledge',
-            user_id=user_id,
-            limit=knowledge_limit,
-            importance_threshold=0.7
-        )
+        # On DynamoDB, conversations, knowledge and preferences come back from one query
+        if self.use_aws_memory and not self.use_bedrock_memory and self.memory_table is not None:
+            recent_conversations, relevant_knowledge, preferences = self._retrieve_context_memories(
+                agent_id, user_id, conversation_limit, knowledge_limit
+            )
+            return ContextWindow(
+                recent_conversations=recent_conversations,
+                relevant_knowledge=relevant_knowledge,
+                user_preferences=preferences[0].metadata if preferences else {},
+                current_topic=self._extract_current_topic(recent_conversations)
+            )
         
-        # Get user preferences
-        user_preferences = self._get_user_preferences(agent_id, user_id)
+        # Bedrock Memory needs one call per memory type; overlap them. Local reads stay inline.
+        if self.use_aws_memory:
+            conversations_future = _RETRIEVAL_POOL.submit(
+                self.retrieve_memories, agent_id, 'conversation', user_id, conversation_limit
+            )
+            knowledge_future = _RETRIEVAL_POOL.submit(
+                self.retrieve_memories, agent_id, 'knowledge', user_id, knowledge_limit,
+                CONTEXT_KNOWLEDGE_THRESHOLD
+            )
+            user_preferences = self._get_user_preferences(agent_id, user_id)
+            recent_conversations = conversations_future.result()
+            relevant_knowledge = knowledge_future.result()
+        else:
+            # Get recent conversations
+            recent_conversations = self.retrieve_memories(
+                agent_id=agent_id,
+                memory_type='conversation',
+                user_id=user_id,
+                limit=conversation_limit
+            )
+            
+            # Get relevant knowledge
+            relevant_knowledge = self.retrieve_memories(
+                agent_id=agent_id,
+                memory_type='knowledge',
+                user_id=user_id,
+                limit=knowledge_limit,
+                importance_threshold=CONTEXT_KNOWLEDGE_THRESHOLD
+            )
+            
+            # Get user preferences
+            user_preferences = self._get_user_preferences(agent_id, user_id)
         
         # Determine current topic from recent conversations
         current_topic = self._extract_current_topic(recent_conversations)
@@ -365,6 +838,64 @@ class MemoryManager:
             current_topic=current_topic
         )
     
+    def _retrieve_context_memories(self, agent_id: str, user_id: Optional[str], conversation_limit: int,
+                                   knowledge_limit: int) -> Tuple[List[MemoryEntry], List[MemoryEntry], List[MemoryEntry]]:
+        """Fetch context-window conversations, knowledge and preferences with one DynamoDB query"""
+        cache_key = (agent_id, '__context__', user_id, conversation_limit, knowledge_limit)
+        cached = self._get_cached_read(cache_key)
+        if cached is not None:
+            return tuple(list(bucket) for bucket in cached)
+        
+        # Preferences are only looked up for a known user
+        wanted = {'conversation': conversation_limit, 'knowledge': knowledge_limit}
+        if user_id:
+            wanted['preferences'] = 1
+        buckets: Dict[str, List[MemoryEntry]] = {memory_type: [] for memory_type in wanted}
+        
+        try:
+            query = {
+                'KeyConditionExpression': 'agent_id = :agent_id',
+                'FilterExpression': 'memory_type IN (:conversation, :knowledge, :preferences) '
+                                    'AND (memory_type <> :knowledge OR importance >= :knowledge_threshold)',
+                'ExpressionAttributeValues': {
+                    ':agent_id': agent_id,
+                    ':conversation': 'conversation',
+                    ':knowledge': 'knowledge',
+                    ':preferences': 'preferences' if user_id else 'conversation',
+                    ':knowledge_threshold': _to_decimal(CONTEXT_KNOWLEDGE_THRESHOLD)
+                },
+                'Limit': sum(wanted.values()) * CONTEXT_QUERY_FUDGE,
+                'ScanIndexForward': False  # Most recent first
+            }
+            
+            # Limit applies before the filter, so read further pages only while a bucket is short
+            for _ in range(CONTEXT_QUERY_MAX_PAGES):
+                response = self.memory_table.query(**query)
+                for item in response['Items']:
+                    memory_type = item['memory_type']
+                    bucket = buckets.get(memory_type)
+                    if bucket is None or len(bucket) >= wanted[memory_type]:
+                        continue
+                    if memory_type == 'knowledge' and item['importance'] < CONTEXT_KNOWLEDGE_THRESHOLD:
+                        continue
+                    bucket.append(self._from_dynamodb_item(item))
+                
+                if 'LastEvaluatedKey' not in response or all(
+                        len(buckets[memory_type]) >= limit for memory_type, limit in wanted.items()):
+                    break
+                query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except ClientError as e:
+            logger.error(f"❌ DynamoDB context retrieval failed: {e}")
+            return (
+                self._retrieve_locally(agent_id, 'conversation', user_id, conversation_limit, 0.0),
+                self._retrieve_locally(agent_id, 'knowledge', user_id, knowledge_limit, CONTEXT_KNOWLEDGE_THRESHOLD),
+                self._retrieve_locally(agent_id, 'preferences', user_id, 1, 0.0) if user_id else []
+            )
+        
+        result = (buckets['conversation'], buckets['knowledge'], buckets.get('preferences', []))
+        self._cache_read(cache_key, result)
+        return tuple(list(bucket) for bucket in result)
+    
     def _get_user_preferences(self, agent_id: str, user_id: Optional[str]) -> Dict[str, Any]:
         """Get user preferences from memory"""
         if not user_id:
@@ -387,12 +918,16 @@ class MemoryManager:
             return None
         
         # Simple topic extraction - in production, use NLP
-        recent_content = ' '.join([conv.content for conv in conversations[:3]])
+        # One regex pass per conversation instead of lowercasing and rescanning per keyword
+        found = set()
+        for conv in conversations[:3]:
+            found.update(match.group(1).lower() for match in TOPIC_PATTERN.finditer(conv.content))
+            if TOPIC_KEYWORDS[0] in found:
+                break
         
-        # Extract keywords (simplified)
-        keywords = ['mobile', 'database', 'ai', 'cloud', 'frontend', 'backend']
-        for keyword in keywords:
-            if keyword.lower() in recent_content.lower():
+        # Keywords keep their original priority order
+        for keyword in TOPIC_KEYWORDS:
+            if keyword in found:
                 return keyword
         
         return None
@@ -400,36 +935,79 @@ class MemoryManager:
     def search_memories(self, agent_id: str, query: str, memory_type: Optional[str] = None,
                        limit: int = 10) -> List[MemoryEntry]:
         """Search memories by content"""
+        query_lower = query.lower()
+        
+        # Local storage keeps a trigram index; queries shorter than a trigram fall back to the scan
+        if not self.use_aws_memory and len(query_lower) >= 3:
+            return self._search_locally(agent_id, query_lower, memory_type, limit)
+        
+        # Remote searches that found nothing are remembered until the agent's memories change
+        miss_key = (agent_id, '__search_miss__', memory_type, query_lower)
+        if self.use_aws_memory and self._get_cached_read(miss_key) is not None:
+            return []
+        
         all_memories = self.retrieve_memories(agent_id, memory_type, limit=1000)
         
         # Simple text search - in production, use vector search
-        query_lower = query.lower()
         matching_memories = []
         
         for memory in all_memories:
             if query_lower in memory.content.lower():
                 matching_memories.append(memory)
         
+        if self.use_aws_memory and not matching_memories:
+            self._cache_read(miss_key, [])
+        
         return matching_memories[:limit]
     
-    def update_memory_importance(self, memory_id: str, agent_id: str, new_importance: float):
-        """Update importance of a memory entry"""
-        if self.use_aws_memory and not self.use_bedrock_memory:
+    def _search_locally(self, agent_id: str, query_lower: str, memory_type: Optional[str],
+                        limit: int) -> List[MemoryEntry]:
+        """Substring search over local memories using the trigram index"""
+        with self._local_lock:
+            index = self._trigram_index.get(agent_id)
+            if not index:
+                return []
+            
+            # Intersect posting lists, smallest first
+            postings = []
+            for trigram in _trigrams(query_lower):
+                ids = index.get(trigram)
+                if not ids:
+                    return []
+                postings.append(ids)
+            postings.sort(key=len)
+            candidate_ids = set(postings[0]).intersection(*postings[1:])
+            by_id = self._local_by_id[agent_id]
+            candidates = [by_id[memory_id] for memory_id in candidate_ids]
+        
+        # Confirm the substring on candidates only, then order newest first like _retrieve_locally
+        candidates.sort(key=lambda c: c[0])
+        matching_memories = [
+            entry for _, entry in candidates
+            if (not memory_type or entry.memory_type == memory_type)
+            and query_lower in entry.content.lower()
+        ]
+        matching_memories.sort(key=lambda x: x.timestamp, reverse=True)
+        return matching_memories[:limit]
+    
+    def update_memory_importance(self, memory_id: str, agent_id: str, new_importance: float,
+                                 memory_type: str):
+        """Update importance of a memory entry; memory_type keys its memory-type index bucket"""
+        if self.use_aws_memory and not self.use_bedrock_memory and self.memory_table is not None:
+            # Applied by the background writer so the caller does not wait on DynamoDB
+            update = _ImportanceUpdate(memory_id, agent_id, memory_type, new_importance)
+            self._ensure_flusher()
             try:
-                self.memory_table.update_item(
-                    Key={'memory_id': memory_id, 'agent_id': agent_id},
-                    UpdateExpression='SET importance = :importance',
-                    ExpressionAttributeValues={':importance': new_importance}
-                )
-            except ClientError as e:
-                logger.error(f"❌ Failed to update memory importance: {e}")
+                self._write_queue.put_nowait(update)
+            except queue.Full:
+                self._apply_importance_update(update)
+            self._invalidate_reads(agent_id)
         else:
             # Update locally
-            if agent_id in self.local_memories:
-                for memory in self.local_memories[agent_id]:
-                    if memory.id == memory_id:
-                        memory.importance = new_importance
-                        break
+            with self._local_lock:
+                indexed = self._local_by_id.get(agent_id, {}).get(memory_id)
+            if indexed is not None:
+                indexed[1].importance = new_importance
     
     def delete_old_memories(self, agent_id: str, days_old: int = 30):
         """Delete memories older than specified days"""
@@ -437,11 +1015,15 @@ class MemoryManager:
         
         if self.use_aws_memory and not self.use_bedrock_memory:
             # DynamoDB TTL will handle this automatically
-            pass
+            self._invalidate_reads(agent_id)
         else:
             # Delete locally
-            if agent_id in self.local_memories:
-                self.local_memories[agent_id] = [
-                    memory for memory in self.local_memories[agent_id]
-                    if memory.timestamp > cutoff_date
-                ]
+            with self._local_lock:
+                if agent_id in self.local_memories:
+                    kept = _AgentMemories()
+                    for memory in reversed(self.local_memories[agent_id].all):
+                        if memory.timestamp > cutoff_date:
+                            kept.add(memory)
+                        else:
+                            self._unindex_entry(memory)
+                    self.local_memories[agent_id] = kept
@@ -5,15 +5,113 @@ Analyzes communication patterns and styles from conversations
 
 import re
 import json
+import threading
+from collections import Counter, OrderedDict, defaultdict
 from typing import Dict, List, Any, Tuple
 from dataclasses import dataclass
 import logging
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Pattern checks used by _extract_common_patterns
+LIST_PATTERN = re.compile(r'\d+\.\s|[-*]\s')
+INLINE_CODE_PATTERN = re.compile(r'`[^`]+`')
+URL_PATTERN = re.compile(r'https?://')
+# Main emoji blocks: pictographs, emoticons, transport, supplemental pictographs, misc symbols
+EMOJI_PATTERN = re.compile('[\U0001F300-\U0001F6FF\U0001F900-\U0001F9FF\u2600-\u26FF]')
+
+# Word tokens for formality counting
+WORD_PATTERN = re.compile(r'\w+')
+
+# Response length thresholds (whitespace-separated words)
+SHORT_RESPONSE_WORDS = 20
+LONG_RESPONSE_WORDS = 100
+
+# Keyword-count bucket shared by every technical category
+TECH_TERMS_BUCKET = ('tech', 'all')
+
+# Formal language patterns
+FORMAL_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\b(please|thank you|appreciate|regards|sincerely)\b',
+    r'\b(would|could|should|might)\b',
+    r'\b(however|therefore|furthermore|moreover)\b',
+    r'\b(utilize|implement|facilitate|endeavor)\b'
+))
+
+# Casual language patterns
+CASUAL_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\b(hey|hi|hello|yo)\b',
+    r'\b(yeah|yep|nope|nah)\b',
+    r'\b(cool|awesome|great|nice)\b',
+    r'\b(btw|fyi|imo|tbh)\b',
+    r'\b(lol|haha|lmao)\b'
+))
+
+# Technical terms by category
+TECHNICAL_CATEGORIES = {
+    'programming': ('code', 'function', 'variable', 'class', 'method', 'algorithm'),
+    'web_dev': ('html', 'css', 'javascript', 'react', 'angular', 'vue'),
+    'backend': ('api', 'server', 'database', 'sql', 'nosql', 'rest'),
+    'cloud': ('aws', 'azure', 'gcp', 'docker', 'kubernetes', 'deployment'),
+    'mobile': ('ios', 'android', 'react native', 'flutter', 'swift', 'kotlin'),
+    'ai_ml': ('machine learning', 'neural network', 'model', 'training', 'inference')
+}
+
+# Communication tone indicators
+TONE_INDICATORS = {
+    'friendly': ('great', 'awesome', 'cool', 'nice', 'good', 'excellent', 'wonderful'),
+    'professional': ('please', 'thank you', 'regards', 'sincerely', 'appreciate'),
+    'technical': ('api', 'database', 'server', 'code', 'function', 'algorithm')
+}
+
+# Personality indicators
+PERSONALITY_INDICATORS = {
+    'detail_oriented': ('specifically', 'precisely', 'exactly', 'detailed', 'thorough'),
+    'collaborative': ('team', 'together', 'collaborate', 'discuss', 'input'),
+    'solution_focused': ('solution', 'fix', 'resolve', 'solve', 'address'),
+    'creative': ('creative', 'innovative', 'unique', 'different', 'approach'),
+    'analytical': ('analyze', 'data', 'metrics', 'measure', 'evaluate')
+}
+
+def _build_formality_tables() -> Tuple[Dict[str, bool], List[Tuple[str, Any, bool]]]:
+    """Split the formal/casual patterns into a word -> is_formal table and multi-word phrases"""
+    
+    # Each pattern is a word-bounded alternation of literals, so a single word
+    # matches exactly when it equals a whole \w+ token; phrases spanning several
+    # tokens keep a word-bounded regex of their own
+    words: Dict[str, bool] = {}
+    phrases: List[Tuple[str, Any, bool]] = []
+    for is_formal, patterns in ((True, FORMAL_PATTERNS), (False, CASUAL_PATTERNS)):
+        for pattern in patterns:
+            for word in pattern.pattern[len(r'\b('):-len(r')\b')].split('|'):
+                if WORD_PATTERN.fullmatch(word):
+                    words[word] = is_formal
+                else:
+                    phrases.append((word, re.compile(rf'\b{re.escape(word)}\b'), is_formal))
+    return words, phrases
+
+def _build_keyword_buckets() -> Dict[str, List[Tuple[str, str]]]:
+    """Map every substring keyword to the buckets it counts towards"""
+    
+    buckets: Dict[str, List[Tuple[str, str]]] = {}
+    
+    # Technical depth only needs the total, so all categories share one bucket
+    for terms in TECHNICAL_CATEGORIES.values():
+        for term in terms:
+            buckets.setdefault(term, []).append(TECH_TERMS_BUCKET)
+    
+    for group, indicators in (('tone', TONE_INDICATORS), ('trait', PERSONALITY_INDICATORS)):
+        for bucket, terms in indicators.items():
+            for term in terms:
+                buckets.setdefault(term, []).append((group, bucket))
+    return buckets
+
+_FORMALITY_WORDS, _FORMALITY_PHRASES = _build_formality_tables()
+_KEYWORD_BUCKETS = _build_keyword_buckets()
+
+@dataclass(slots=True, frozen=True)
 class StyleAnalysis:
-    """Analysis of communication style"""
+    """Analysis of communication style (immutable, since analyses are cached and shared)"""
     formality_score: float  # 0.0 (casual) to 1.0 (formal)
     technical_depth: str    # 'low', 'medium', 'high'
     response_length: str    # 'short', 'medium', 'long'
@@ -24,65 +122,88 @@ class StyleAnalysis:
 class StyleAnalyzer:
     """Analyzes communication style and patterns"""
     
-    def __init__(self):
-        # Formal language patterns
-        self.formal_patterns = [
-            r'\b(please|thank you|appreciate|regards|sincerely)\b',
-            r'\b(would|could|should|might)\b',
-            r'\b(however|therefore|furthermore|moreover)\b',
-            r'\b(utilize|implement|facilitate|endeavor)\b'
-        ]
-        
-        # Casual language patterns
-        self.casual_patterns = [
-            r'\b(hey|hi|hello|yo)\b',
-            r'\b(yeah|yep|nope|nah)\b',
-            r'\b(cool|awesome|great|nice)\b',
-            r'\b(btw|fyi|imo|tbh)\b',
-            r'\b(lol|haha|lmao)\b'
-        ]
-        
-        # Technical terms by category
-        self.technical_categories = {
-            'programming': ['code', 'function', 'variable', 'class', 'method', 'algorithm'],
-            'web_dev': ['html', 'css', 'javascript', 'react', 'angular', 'vue'],
-            'backend': ['api', 'server', 'database', 'sql', 'nosql', 'rest'],
-            'cloud': ['aws', 'azure', 'gcp', 'docker', 'kubernetes', 'deployment'],
-            'mobile': ['ios', 'android', 'react native', 'flutter', 'swift', 'kotlin'],
-            'ai_ml': ['machine learning', 'neural network', 'model', 'training', 'inference']
-        }
-        
-        # Personality indicators
-        self.personality_indicators = {
-            'detail_oriented': ['specifically', 'precisely', 'exactly', 'detailed', 'thorough'],
-            'collaborative': ['team', 'together', 'collaborate', 'discuss', 'input'],
-            'solution_focused': ['solution', 'fix', 'resolve', 'solve', 'address'],
-            'creative': ['creative', 'innovative', 'unique', 'different', 'approach'],
-            'analytical': ['analyze', 'data', 'metrics', 'measure', 'evaluate']
-        }
+    def __init__(self, cache_size: int = 2048):
+        # LRU cache of analyses keyed by the raw text (repeated greetings, boilerplate)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, StyleAnalysis]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Keyword tables are built once per process and shared by every instance
+        self.formal_patterns = FORMAL_PATTERNS
+        self.casual_patterns = CASUAL_PATTERNS
+        self.technical_categories = TECHNICAL_CATEGORIES
+        self.tone_indicators = TONE_INDICATORS
+        self.personality_indicators = PERSONALITY_INDICATORS
+        self._formality_words = _FORMALITY_WORDS
+        self._formality_phrases = _FORMALITY_PHRASES
+        self._keyword_buckets = _KEYWORD_BUCKETS
+    
+    def _scan_keywords(self, text: str) -> Dict[Tuple[str, str], int]:
+        """Count distinct keywords present per (group, bucket), testing each keyword once"""
+        
+        counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        for keyword, keys in self._keyword_buckets.items():
+            if keyword in text:
+                for key in keys:
+                    counts[key] += 1
+        return counts
     
     def analyze_style(self, text: str) -> StyleAnalysis:
-        """Analyze communication style from text"""
+        """Analyze communication style from text (cached; treat the result as read-only)"""
+        
+        if self.cache_size <= 0:
+            return self._analyze_style(text)
+        
+        with self._cache_lock:
+            analysis = self._cache.get(text)
+            if analysis is not None:
+                self._cache.move_to_end(text)
+                return analysis
+        
+        analysis = self._analyze_style(text)
+        self._remember(text, analysis)
+        return analysis
+    
+    def _remember(self, text: str, analysis: StyleAnalysis):
+        """Store an analysis, evicting the least recently used entry when full"""
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[text] = analysis
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def _analyze_many(self, texts: List[str]) -> List[StyleAnalysis]:
+        """Analyze a batch of texts, once per distinct text"""
+        analyses = {text: self.analyze_style(text) for text in dict.fromkeys(texts)}
+        return [analyses[text] for text in texts]
+    
+    def _analyze_style(self, text: str) -> StyleAnalysis:
+        """Run the full style analysis on a text"""
         
         text_lower = text.lower()
         
+        # Single keyword pass feeding technical depth, tone and personality
+        keyword_counts = self._scan_keywords(text_lower)
+        
         # Analyze formality
         formality_score = self._analyze_formality(text_lower)
         
         # Analyze technical depth
-        technical_depth = self._analyze_technical_depth(text_lower)
+        technical_depth = self._analyze_technical_depth(keyword_counts)
         
         # Analyze response length
         response_length = self._analyze_response_length(text)
         
         # Analyze communication tone
-        communication_tone = self._analyze_communication_tone(text_lower)
+        communication_tone = self._analyze_communication_tone(keyword_counts)
         
         # Extract common patterns
         common_patterns = self._extract_common_patterns(text_lower)
         
         # Analyze personality traits
-        personality_traits = self._analyze_personality_traits(text_lower)
+        personality_traits = self._analyze_personality_traits(keyword_counts)
         
         return StyleAnalysis(
             formality_score=formality_score,
@@ -99,13 +220,23 @@ class StyleAnalyzer:
         formal_count = 0
         casual_count = 0
         
-        # Count formal patterns
-        for pattern in self.formal_patterns:
-            formal_count += len(re.findall(pattern, text))
-        
-        # Count casual patterns
-        for pattern in self.casual_patterns:
-            casual_count += len(re.findall(pattern, text))
+        # Count formal and casual words in one tokenizing pass
+        for token in WORD_PATTERN.findall(text):
+            is_formal = self._formality_words.get(token)
+            if is_formal is None:
+                continue
+            if is_formal:
+                formal_count += 1
+            else:
+                casual_count += 1
+        
+        for phrase, pattern, is_formal in self._formality_phrases:
+            if phrase in text:
+                hits = len(pattern.findall(text))
+                if is_formal:
+                    formal_count += hits
+                else:
+                    casual_count += hits
         
         # Calculate formality score
         total_patterns = formal_count + casual_count
@@ -114,17 +245,10 @@ class StyleAnalyzer:
         
         return formal_count / total_patterns
     
-    def _analyze_technical_depth(self, text: str) -> str:
-        """Analyze technical depth of the text"""
-        
-        total_tech_terms = 0
-        category_counts = {}
+    def _analyze_technical_depth(self, keyword_counts: Dict[Tuple[str, str], int]) -> str:
+        """Analyze technical depth from the keyword counts"""
         
-        # Count technical terms by category
-        for category, terms in self.technical_categories.items():
-            count = sum(1 for term in terms if term in text)
-            category_counts[category] = count
-            total_tech_terms += count
+        total_tech_terms = keyword_counts.get(TECH_TERMS_BUCKET, 0)
         
         # Determine technical depth
         if total_tech_terms >= 5:
@@ -137,29 +261,26 @@ class StyleAnalyzer:
     def _analyze_response_length(self, text: str) -> str:
         """Analyze response length category"""
         
-        word_count = len(text.split())
+        # n words need at least 2n - 1 characters, so short texts need no split at all
+        if len(text) <= 2 * SHORT_RESPONSE_WORDS:
+            return 'short'
+        
+        # Only the thresholds matter, so stop splitting once the text is known to be long
+        word_count = len(text.split(None, LONG_RESPONSE_WORDS))
         
-        if word_count <= 20:
+        if word_count <= SHORT_RESPONSE_WORDS:
             return 'short'
-        elif word_count <= 100:
+        elif word_count <= LONG_RESPONSE_WORDS:
             return 'medium'
         else:
             return 'long'
     
-    def _analyze_communication_tone(self, text: str) -> str:
-        """Analyze communication tone"""
+    def _analyze_communication_tone(self, keyword_counts: Dict[Tuple[str, str], int]) -> str:
+        """Analyze communication tone from the keyword counts"""
         
-        # Friendly indicators
-        friendly_indicators = ['great', 'awesome', 'cool', 'nice', 'good', 'excellent', 'wonderful']
-        friendly_count = sum(1 for indicator in friendly_indicators if indicator in text)
-        
-        # Professional indicators
-        professional_indicators = ['please', 'thank you', 'regards', 'sincerely', 'appreciate']
-        professional_count = sum(1 for indicator in professional_indicators if indicator in text)
-        
-        # Technical indicators
-        technical_indicators = ['api', 'database', 'server', 'code', 'function', 'algorithm']
-        technical_count = sum(1 for indicator in technical_indicators if indicator in text)
+        friendly_count = keyword_counts.get(('tone', 'friendly'), 0)
+        professional_count = keyword_counts.get(('tone', 'professional'), 0)
+        technical_count = keyword_counts.get(('tone', 'technical'), 0)
         
         # Determine dominant tone
         if technical_count > friendly_count and technical_count > professional_count:
@@ -183,31 +304,30 @@ class StyleAnalyzer:
             patterns.append('uses_exclamations')
         
         # List patterns
-        if re.search(r'\d+\.\s', text) or re.search(r'[-*]\s', text):
+        if LIST_PATTERN.search(text):
             patterns.append('uses_lists')
         
         # Code patterns
-        if '```' in text or re.search(r'`[^`]+`', text):
+        if '```' in text or INLINE_CODE_PATTERN.search(text):
             patterns.append('includes_code')
         
         # URL patterns
-        if re.search(r'https?://', text):
+        if URL_PATTERN.search(text):
             patterns.append('shares_links')
         
         # Emoji patterns
-        if re.search(r'[😀-🙏]', text):
+        if EMOJI_PATTERN.search(text):
             patterns.append('uses_emojis')
         
         return patterns
     
-    def _analyze_personality_traits(self, text: str) -> List[str]:
-        """Analyze personality traits from text"""
+    def _analyze_personality_traits(self, keyword_counts: Dict[Tuple[str, str], int]) -> List[str]:
+        """Analyze personality traits from the keyword counts"""
         
         traits = []
         
-        for trait, indicators in self.personality_indicators.items():
-            count = sum(1 for indicator in indicators if indicator in text)
-            if count >= 2:  # Threshold for trait detection
+        for trait in self.personality_indicators:
+            if keyword_counts.get(('trait', trait), 0) >= 2:  # Threshold for trait detection
                 traits.append(trait)
         
         return traits
@@ -274,36 +394,34 @@ class StyleAnalyzer:
             return {}
         
         # Analyze all conversations
-        analyses = [self.analyze_style(conv) for conv in conversations]
-        
-        # Calculate averages
-        avg_formality = sum(a.formality_score for a in analyses) / len(analyses)
-        
-        # Most common technical depth
-        tech_depths = [a.technical_depth for a in analyses]
-        most_common_tech_depth = max(set(tech_depths), key=tech_depths.count)
-        
-        # Most common response length
-        response_lengths = [a.response_length for a in analyses]
-        most_common_response_length = max(set(response_lengths), key=response_lengths.count)
-        
-        # Most common tone
-        tones = [a.communication_tone for a in analyses]
-        most_common_tone = max(set(tones), key=tones.count)
-        
-        # Aggregate patterns
-        all_patterns = []
+        analyses = self._analyze_many(conversations)
+        
+        # Tally every aggregate in a single pass over the analyses
+        formality_total = 0.0
+        tech_depths: Counter = Counter()
+        response_lengths: Counter = Counter()
+        tones: Counter = Counter()
+        patterns = set()
+        traits = set()
         for analysis in analyses:
-            all_patterns.extend(analysis.common_patterns)
+            formality_total += analysis.formality_score
+            tech_depths[analysis.technical_depth] += 1
+            response_lengths[analysis.response_length] += 1
+            tones[analysis.communication_tone] += 1
+            patterns.update(analysis.common_patterns)
+            traits.update(analysis.personality_traits)
         
-        common_patterns = list(set(all_patterns))
+        # Calculate averages
+        avg_formality = formality_total / len(analyses)
         
-        # Aggregate personality traits
-        all_traits = []
-        for analysis in analyses:
-            all_traits.extend(analysis.personality_traits)
+        # Most common technical depth, response length and tone (first seen wins ties)
+        most_common_tech_depth = tech_depths.most_common(1)[0][0]
+        most_common_response_length = response_lengths.most_common(1)[0][0]
+        most_common_tone = tones.most_common(1)[0][0]
         
-        personality_traits = list(set(all_traits))
+        # Aggregate patterns and personality traits
+        common_patterns = list(patterns)
+        personality_traits = list(traits)
         
         return {
             'avg_formality': avg_formality,
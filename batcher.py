@@ -0,0 +1,110 @@
+"""
+Micro-batcher for Strands Agent Invocations
+Coalesces concurrent prompts into short dispatch windows
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Batcher:
+    """Collects prompts for up to max_latency_ms (or max_batch items) and dispatches them together.
+    The window is off by default; with dedupe, identical prompts in a batch share one model call."""
+
+    def __init__(self, handler: Callable[[str], Awaitable[str]],
+                 max_batch: int = 16, max_latency_ms: float = 0, dedupe: bool = False):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000
+        self.dedupe = dedupe
+        self.queue: Optional["asyncio.Queue[Tuple[str, asyncio.Future]]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._collecting: List[Tuple[str, asyncio.Future]] = []  # taken off the queue, not yet dispatched
+
+    def start(self):
+        """Start the background batching loop on the running event loop (idempotent)"""
+        if self._task is None or self._task.done():
+            self.queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop batching, dispatch anything still waiting, and wait for every batch to finish"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        # Prompts caught mid-window or still queued are answered rather than left hanging
+        items, self._collecting = self._collecting, []
+        while self.queue is not None and not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        if items:
+            self._schedule(items)
+        
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def submit(self, prompt: str) -> str:
+        """Queue a prompt and wait for its response"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((prompt, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = self._collecting = [await self.queue.get()]
+
+            # A lone prompt goes out at once; the window only opens when others are already waiting
+            if self.max_latency > 0 and not self.queue.empty():
+                deadline = loop.time() + self.max_latency
+                while len(items) < self.max_batch:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        items.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+            self._collecting = []
+            self._schedule(items)
+
+    def _schedule(self, items: List[Tuple[str, asyncio.Future]]):
+        # Dispatch without blocking the next collection window
+        task = asyncio.create_task(self._dispatch(items))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, items: List[Tuple[str, asyncio.Future]]):
+        # The model samples at a non-zero temperature, so identical prompts only share
+        # one answer when dedupe is on
+        if self.dedupe:
+            waiters: Dict[str, List[asyncio.Future]] = {}
+            for prompt, future in items:
+                waiters.setdefault(prompt, []).append(future)
+            groups = list(waiters.items())
+        else:
+            groups = [(prompt, [future]) for prompt, future in items]
+
+        if len(items) > 1:
+            logger.debug("Dispatching batch of %d requests (%d model calls)", len(items), len(groups))
+
+        results = await asyncio.gather(*(self.handler(prompt) for prompt, _ in groups), return_exceptions=True)
+
+        for (_, futures), result in zip(groups, results):
+            for future in futures:
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
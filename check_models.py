@@ -1,3 +1,4 @@
+import sys
 import boto3
 from botocore.exceptions import ClientError
 
@@ -9,16 +10,18 @@ def list_available_models():
         # List foundation models
         response = bedrock.list_foundation_models()
         
-        print("Available Foundation Models in eu-west-2:")
-        print("=" * 50)
+        lines = ["Available Foundation Models in eu-west-2:", "=" * 50]
         
         for model in response['modelSummaries']:
-            print(f"Model ID: {model['modelId']}")
-            print(f"Model Name: {model['modelName']}")
-            print(f"Provider: {model['providerName']}")
-            print(f"Input Modalities: {model['inputModalities']}")
-            print(f"Output Modalities: {model['outputModalities']}")
-            print("-" * 30)
+            lines.append(f"Model ID: {model['modelId']}")
+            lines.append(f"Model Name: {model['modelName']}")
+            lines.append(f"Provider: {model['providerName']}")
+            lines.append(f"Input Modalities: {model['inputModalities']}")
+            lines.append(f"Output Modalities: {model['outputModalities']}")
+            lines.append("-" * 30)
+        
+        # Emit the whole listing in one write
+        sys.stdout.write("\n".join(lines) + "\n")
             
     except ClientError as e:
         print(f"Error: {e}")
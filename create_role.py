@@ -1,5 +1,6 @@
 import boto3
 import json
+import time
 
 # Create IAM client
 iam_client = boto3.client('iam', region_name='us-east-1')
@@ -7,6 +8,10 @@ iam_client = boto3.client('iam', region_name='us-east-1')
 # Role name
 role_name = 'AgentRuntimeRole'
 
+# IAM is eventually consistent: GetRole succeeds as soon as create_role returns, but the
+# service principal may not be able to assume the role for several more seconds
+ROLE_PROPAGATION_DELAY = 10
+
 # Trust policy for Bedrock AgentCore
 trust_policy = {
     "Version": "2012-10-17",
@@ -61,10 +66,10 @@ try:
     )
     print("✅ Permission policy attached successfully")
     
-    # Wait a moment for the role to propagate
-    import time
+    # The role is assumed by the AgentCore service, not this script, so there is no call here
+    # that proves it is assumable; wait a bounded time for IAM to propagate it
     print("Waiting for role to propagate...")
-    time.sleep(10)
+    time.sleep(ROLE_PROPAGATION_DELAY)
     
     print(f"\n🎉 IAM Role '{role_name}' is ready!")
     print(f"Role ARN: {response['Role']['Arn']}")
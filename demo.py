@@ -10,11 +10,21 @@ import time
 import requests
 from threading import Thread
 import os
+from requests.adapters import HTTPAdapter
 
-def check_twin_system_running():
+# Back-off between readiness probes while the twin system starts (about 10s in total)
+STARTUP_PROBE_DELAYS = (0.05, 0.1, 0.2, 0.4, 0.8, 1.0, 1.0, 1.0, 2.0, 2.0, 1.5)
+
+def _probe_session():
+    """Single-connection session so repeated probes reuse one keep-alive socket"""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    return session
+
+def check_twin_system_running(session=None):
     """Check if twin system is running"""
     try:
-        response = requests.get("http://localhost:8080/ping", timeout=2)
+        response = (session or requests).get("http://localhost:8080/ping", timeout=2)
         return response.status_code == 200
     except:
         return False
@@ -28,13 +38,15 @@ def start_twin_system():
             sys.executable, "twin_system.py"
         ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         
-        # Wait for it to start
-        for i in range(10):
-            if check_twin_system_running():
-                print("✅ Twin System is running!")
-                return process
-            time.sleep(1)
-            print(f"⏳ Waiting for system to start... ({i+1}/10)")
+        # Wait for it to start, probing quickly at first and backing off
+        with _probe_session() as session:
+            for attempt, delay in enumerate(STARTUP_PROBE_DELAYS, 1):
+                time.sleep(delay)
+                if check_twin_system_running(session):
+                    print("✅ Twin System is running!")
+                    return process
+                if delay >= 1:
+                    print(f"⏳ Waiting for system to start... ({attempt}/{len(STARTUP_PROBE_DELAYS)})")
         
         print("❌ Failed to start twin system")
         return None
@@ -4,27 +4,81 @@ Interactive Terminal Chat Interface for AppBank Twin System
 Perfect for demos and proof of concept presentations
 """
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+
+# Chat turns kept for /history; older turns are dropped
+HISTORY_LIMIT = 200
+
+# Seconds a fetched agent memory count is reused by /agents
+MEMORY_COUNT_TTL = 60
+
+# (connect, read) timeouts; chat turns may fan out to several model calls
+DEFAULT_TIMEOUT = (3.05, 30)
+MESSAGE_TIMEOUT = (3.05, 120)
+
+# Transient gateway errors are retried on the pooled connection with back-off. Only GETs
+# are retried on a status or read error: a 504 on a POST may come after the agents already
+# ran, and replaying it would pay for the model calls and store the memories again.
+# POSTs are still retried when the connection could not be made, since nothing was sent
+RETRY_POLICY = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset(["GET"]),
+    raise_on_status=False
+)
 
 class AppBankChat:
     def __init__(self, base_url: str = "http://localhost:8080"):
         self.base_url = base_url
-        self.session_history = []
+        self._twin_url = f"{base_url}/twin-system"
+        self._agent_memory_url = f"{base_url}/agent/{{}}/memory"
+        self.session_history = deque(maxlen=HISTORY_LIMIT)
         self.available_agents = {}
+        self._name_to_id = {}
+        self._memory_counts: Dict[str, Tuple[float, int]] = {}
+        self._context = {"interactive_session": True, "timestamp": None}
+        self._welcome_text = ""
         self.current_mode = "orchestrator"
         self.current_agent = None
         
+        # One keep-alive session for every call to the twin system
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=RETRY_POLICY)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": "AppBankChat/1.0",
+            "Content-Type": "application/json"
+        })
+        
         # Load available agents
         self._load_agents()
         
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the shared session with the default timeout"""
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        return self.session.get(url, **kwargs)
+    
+    def _post(self, url: str, **kwargs) -> requests.Response:
+        """POST through the shared session with the default timeout"""
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        return self.session.post(url, **kwargs)
+    
     def _load_agents(self):
         """Load available agents from the twin system"""
         try:
-            response = requests.get(f"{self.base_url}/agents")
+            response = self._get(f"{self.base_url}/agents")
             if response.status_code == 200:
                 agents_data = response.json()
                 for agent in agents_data["agents"]:
@@ -33,6 +87,11 @@ class AppBankChat:
                         "role": agent["role"],
                         "expertise": agent["expertise"]
                     }
+                # Case-insensitive name index for /agent
+                self._name_to_id = {
+                    info["name"].lower(): agent_id for agent_id, info in self.available_agents.items()
+                }
+                self._welcome_text = self._render_welcome()
                 print(f"✅ Connected to AppBank Twin System - {len(self.available_agents)} agents available")
             else:
                 print(f"❌ Failed to load agents: {response.status_code}")
@@ -42,30 +101,40 @@ class AppBankChat:
             print("💡 Make sure your twin system is running: uv run twin_system.py")
             sys.exit(1)
     
-    def display_welcome(self):
-        """Display welcome message and instructions"""
-        print("\n" + "="*80)
-        print("🏦 Welcome to AppBank AI Twin System - Interactive Chat")
-        print("="*80)
-        print("\n🎯 Available Chat Modes:")
-        print("  1. 🤝 ORCHESTRATOR (default) - Team Coordinator routes your request")
-        print("  2. 🎯 DIRECT - Talk directly to a specific agent")
-        print("\n👥 Available Agents:")
+    def _render_welcome(self) -> str:
+        """Render the welcome banner and instructions once the agents are known"""
+        lines = [
+            "\n" + "="*80,
+            "🏦 Welcome to AppBank AI Twin System - Interactive Chat",
+            "="*80,
+            "\n🎯 Available Chat Modes:",
+            "  1. 🤝 ORCHESTRATOR (default) - Team Coordinator routes your request",
+            "  2. 🎯 DIRECT - Talk directly to a specific agent",
+            "\n👥 Available Agents:"
+        ]
         for agent_id, agent_info in self.available_agents.items():
-            print(f"  • {agent_info['name']} ({agent_info['role']})")
-            print(f"    Expertise: {', '.join(agent_info['expertise'])}")
+            lines.append(f"  • {agent_info['name']} ({agent_info['role']})")
+            lines.append(f"    Expertise: {', '.join(agent_info['expertise'])}")
         
-        print("\n🔧 Commands:")
-        print("  /mode orchestrator  - Switch to orchestrator mode")
-        print("  /mode direct        - Switch to direct agent mode")
-        print("  /agent <agent_name> - Set target agent for direct mode")
-        print("  /agents             - List all agents")
-        print("  /history            - Show chat history")
-        print("  /clear              - Clear chat history")
-        print("  /help               - Show this help")
-        print("  /quit or /exit      - Exit the chat")
-        print("\n💬 Just type your message to start chatting!")
-        print("-"*80)
+        lines += [
+            "\n🔧 Commands:",
+            "  /mode orchestrator  - Switch to orchestrator mode",
+            "  /mode direct        - Switch to direct agent mode",
+            "  /agent <agent_name> - Set target agent for direct mode",
+            "  /agents             - List all agents",
+            "  /history            - Show chat history",
+            "  /clear              - Clear chat history",
+            "  /help               - Show this help",
+            "  /quit or /exit      - Exit the chat",
+            "\n💬 Just type your message to start chatting!",
+            "-"*80
+        ]
+        return "\n".join(lines) + "\n"
+    
+    def display_welcome(self):
+        """Display welcome message and instructions"""
+        sys.stdout.write(self._welcome_text)
+        sys.stdout.flush()
     
     def display_status(self):
         """Display current chat status"""
@@ -102,11 +171,7 @@ class AppBankChat:
             if len(parts) > 1:
                 agent_name = ' '.join(parts[1:]).lower()
                 # Find agent by name (case insensitive)
-                found_agent = None
-                for agent_id, agent_info in self.available_agents.items():
-                    if agent_info['name'].lower() == agent_name:
-                        found_agent = agent_id
-                        break
+                found_agent = self._name_to_id.get(agent_name)
                 
                 if found_agent:
                     self.current_agent = found_agent
@@ -121,6 +186,7 @@ class AppBankChat:
                 
         elif cmd == '/agents':
             print("\n👥 Available Agents:")
+            self._refresh_memory_counts()
             for agent_id, agent_info in self.available_agents.items():
                 memory_count = self._get_agent_memory_count(agent_id)
                 print(f"  • {agent_info['name']} ({agent_info['role']}) - {memory_count} memories")
@@ -139,14 +205,44 @@ class AppBankChat:
         return False
     
     def _get_agent_memory_count(self, agent_id: str) -> int:
-        """Get memory count for an agent"""
+        """Get memory count for an agent (cached for MEMORY_COUNT_TTL seconds)"""
+        cached = self._memory_counts.get(agent_id)
+        if cached and time.monotonic() - cached[0] < MEMORY_COUNT_TTL:
+            return cached[1]
+        
+        count = self._fetch_agent_memory_count(agent_id)
+        if count is None:
+            return 0
+        self._memory_counts[agent_id] = (time.monotonic(), count)
+        return count
+    
+    def _refresh_memory_counts(self):
+        """Fetch every stale memory count in parallel so /agents costs about one round-trip"""
+        now = time.monotonic()
+        stale = [
+            agent_id for agent_id in self.available_agents
+            if agent_id not in self._memory_counts or now - self._memory_counts[agent_id][0] >= MEMORY_COUNT_TTL
+        ]
+        if not stale:
+            return
+        
+        with ThreadPoolExecutor(max_workers=min(len(stale), 10)) as executor:
+            counts = list(executor.map(self._fetch_agent_memory_count, stale))
+        
+        fetched_at = time.monotonic()
+        for agent_id, count in zip(stale, counts):
+            if count is not None:
+                self._memory_counts[agent_id] = (fetched_at, count)
+    
+    def _fetch_agent_memory_count(self, agent_id: str) -> Optional[int]:
+        """Fetch an agent's memory count from the twin system (None on failure)"""
         try:
-            response = requests.get(f"{self.base_url}/agent/{agent_id}/memory")
+            response = self._get(self._agent_memory_url.format(agent_id))
             if response.status_code == 200:
                 return response.json()["memory_entries"]
         except:
             pass
-        return 0
+        return None
     
     def _display_history(self):
         """Display chat history"""
@@ -160,37 +256,32 @@ class AppBankChat:
             timestamp = entry['timestamp']
             mode = entry['mode']
             agent = entry.get('agent', 'Team Coordinator')
-            user_msg = entry['user_message'][:100] + "..." if len(entry['user_message']) > 100 else entry['user_message']
             
             print(f"{i}. [{timestamp}] {mode.upper()}")
-            print(f"   👤 You: {user_msg}")
+            print(f"   👤 You: {entry['user_preview']}")
             print(f"   🤖 {agent}: Response received")
             print()
     
     def send_message(self, message: str) -> Optional[Dict]:
         """Send message to the twin system"""
         try:
-            if self.current_mode == "orchestrator":
-                payload = {
-                    "user_message": message,
-                    "collaboration_mode": "orchestrator",
-                    "context": {"interactive_session": True, "timestamp": datetime.now().isoformat()}
-                }
-                endpoint = "/twin-system"
-            else:  # direct mode
-                if not self.current_agent:
-                    print("❌ No agent selected for direct mode. Use /agent <name> first")
-                    return None
-                    
-                payload = {
-                    "user_message": message,
-                    "target_agent": self.current_agent,
-                    "collaboration_mode": "direct",
-                    "context": {"interactive_session": True, "timestamp": datetime.now().isoformat()}
-                }
-                endpoint = "/twin-system"
+            if self.current_mode != "orchestrator" and not self.current_agent:
+                print("❌ No agent selected for direct mode. Use /agent <name> first")
+                return None
             
-            response = requests.post(f"{self.base_url}{endpoint}", json=payload)
+            # The context is reused across turns (it is serialized immediately); orjson
+            # formats the datetime itself, identically to isoformat()
+            self._context["timestamp"] = datetime.now()
+            payload = {
+                "user_message": message,
+                "collaboration_mode": self.current_mode,
+                "context": self._context
+            }
+            if self.current_mode == "direct":
+                payload["target_agent"] = self.current_agent
+            
+            # orjson encodes straight to bytes; the session already sends Content-Type: application/json
+            response = self._post(self._twin_url, data=orjson.dumps(payload), timeout=MESSAGE_TIMEOUT)
             
             if response.status_code == 200:
                 result = response.json()
@@ -217,6 +308,8 @@ class AppBankChat:
             "mode": self.current_mode,
             "agent": agent_name,
             "user_message": user_message,
+            # Truncated once here rather than on every /history
+            "user_preview": user_message[:100] + "..." if len(user_message) > 100 else user_message,
             "response": response_text
         }
         self.session_history.append(history_entry)
@@ -232,33 +325,40 @@ class AppBankChat:
         """Run the interactive chat loop"""
         self.display_welcome()
         
-        while True:
-            try:
-                self.display_status()
-                user_input = input("\n💬 You: ").strip()
-                
-                if not user_input:
-                    continue
-                
-                # Handle commands
-                if user_input.startswith('/'):
-                    if self.handle_command(user_input):
-                        break
-                    continue
-                
-                # Send message to twin system
-                print("\n🔄 Processing your request...")
-                result = self.send_message(user_input)
-                
-                if result:
-                    self.display_response(result, user_input)
-                
-            except KeyboardInterrupt:
-                print("\n\n👋 Goodbye!")
-                break
-            except EOFError:
-                print("\n\n👋 Goodbye!")
-                break
+        try:
+            while True:
+                try:
+                    self.display_status()
+                    user_input = input("\n💬 You: ").strip()
+                    
+                    if not user_input:
+                        continue
+                    
+                    # Handle commands
+                    if user_input.startswith('/'):
+                        if self.handle_command(user_input):
+                            break
+                        continue
+                    
+                    # Send message to twin system
+                    print("\n🔄 Processing your request...")
+                    result = self.send_message(user_input)
+                    
+                    if result:
+                        self.display_response(result, user_input)
+                    
+                except KeyboardInterrupt:
+                    print("\n\n👋 Goodbye!")
+                    break
+                except EOFError:
+                    print("\n\n👋 Goodbye!")
+                    break
+        finally:
+            self.close()
+    
+    def close(self):
+        """Release the pooled connections"""
+        self.session.close()
 
 def main():
     """Main function to run the interactive chat"""
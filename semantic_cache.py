@@ -0,0 +1,117 @@
+"""
+Semantic Response Cache for Strands Agents
+Near-duplicate cache in front of model calls, matched on the cosine similarity of message embeddings
+"""
+
+import asyncio
+import math
+from array import array
+import re
+import time
+from collections import OrderedDict
+from operator import mul
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+Embedding = Sequence[float]
+
+
+class SemanticCache:
+    """Per-scope cache of (embedding, response) pairs; a lookup hits when the closest entry clears the threshold.
+    Each scope holds up to maxsize entries, and at most max_scopes scopes are kept (least recently used go first)."""
+
+    def __init__(self, embed: Callable[[str], Awaitable[Embedding]],
+                 threshold: float = 0.95, maxsize: int = 256, ttl: float = 3600,
+                 max_scopes: int = 256):
+        self.embed = embed
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_scopes = max_scopes
+        self._scopes: "OrderedDict[Hashable, OrderedDict[str, Tuple[Embedding, str, float]]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return 0 < self.threshold <= 1 and self.ttl > 0 and self.maxsize > 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Case- and whitespace-insensitive form of a message"""
+        return WHITESPACE_PATTERN.sub(" ", text).strip().lower()
+
+    @staticmethod
+    def _unit(vector: Embedding) -> Embedding:
+        """Normalized copy as packed 32-bit floats, an eighth of the size of a float list"""
+        norm = math.sqrt(sum(map(mul, vector, vector))) or 1.0
+        return array("f", (x / norm for x in vector))
+
+    async def get(self, scope: Hashable, text: str) -> Tuple[Optional[str], Optional[Embedding]]:
+        """Return the cached response (or None) and the message embedding, so a miss can be stored without re-embedding"""
+        key = self.normalize(text)
+        now = time.monotonic()
+        async with self._lock:
+            entries = self._scopes.get(scope)
+            if entries is not None:
+                for stale in [k for k, (_, _, expires_at) in entries.items() if expires_at <= now]:
+                    del entries[stale]
+                if not entries:
+                    del self._scopes[scope]
+                    entries = None
+                else:
+                    self._scopes.move_to_end(scope)
+            if entries:
+                # Exact repeats never need an embedding call
+                if key in entries:
+                    entries.move_to_end(key)
+                    self.hits += 1
+                    return entries[key][1], entries[key][0]
+            candidates = list(entries.items()) if entries else []
+
+        embedding = self._unit(await self.embed(key))
+
+        best_key, best_score = None, self.threshold
+        for entry_key, (vector, _, _) in candidates:
+            score = sum(map(mul, embedding, vector))
+            if score >= best_score:
+                best_key, best_score = entry_key, score
+
+        async with self._lock:
+            entries = self._scopes.get(scope)
+            if best_key is not None and entries and best_key in entries:
+                entries.move_to_end(best_key)
+                self.hits += 1
+                return entries[best_key][1], embedding
+            self.misses += 1
+            return None, embedding
+
+    async def set(self, scope: Hashable, text: str, value: str, embedding: Optional[Embedding] = None):
+        """Store a response, evicting the scope's least recently used entry when full"""
+        key = self.normalize(text)
+        embedding = embedding if embedding is not None else self._unit(await self.embed(key))
+        expires_at = time.monotonic() + self.ttl
+        async with self._lock:
+            entries = self._scopes.get(scope)
+            if entries is None:
+                entries = self._scopes[scope] = OrderedDict()
+            self._scopes.move_to_end(scope)
+            entries[key] = (embedding, value, expires_at)
+            entries.move_to_end(key)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for monitoring"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "scopes": len(self._scopes),
+            "max_scopes": self.max_scopes,
+            "size": sum(len(entries) for entries in self._scopes.values()),
+            "maxsize": self.maxsize
+        }
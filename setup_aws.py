@@ -5,9 +5,24 @@ This script helps you set up and test your AWS Bedrock configuration
 """
 
 import os
+from functools import lru_cache
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 
+# Shared by every client this script creates
+_BOTO_CONFIG = Config(max_pool_connections=20, retries={"max_attempts": 3, "mode": "adaptive"})
+
+@lru_cache(maxsize=None)
+def _client(service, region):
+    """One client per (service, region); creating a client resolves credentials and loads models"""
+    return boto3.client(service, region_name=region, config=_BOTO_CONFIG)
+
+@lru_cache(maxsize=None)
+def _list_models(region):
+    """ListFoundationModels once per region; the access check and the listing share it"""
+    return _client('bedrock', region).list_foundation_models()
+
 def check_aws_credentials():
     """Check if AWS credentials are properly configured"""
     print("Checking AWS credentials...")
@@ -36,10 +51,8 @@ def check_bedrock_access(region="eu-west-2"):
     print(f"\nChecking Bedrock access in {region}...")
     
     try:
-        bedrock = boto3.client('bedrock', region_name=region)
-        
         # Try to list models
-        response = bedrock.list_foundation_models()
+        response = _list_models(region)
         print(f"✅ Bedrock accessible in {region}")
         print(f"   Found {len(response['modelSummaries'])} models")
         return True
@@ -68,8 +81,7 @@ def list_available_models(region="eu-west-2"):
     print(f"\nListing available models in {region}...")
     
     try:
-        bedrock = boto3.client('bedrock', region_name=region)
-        response = bedrock.list_foundation_models()
+        response = _list_models(region)
         
         print("Available Models:")
         print("=" * 80)
@@ -90,7 +102,7 @@ def test_model_invocation(model_id, region="eu-west-2"):
     print(f"\nTesting model invocation for {model_id} in {region}...")
     
     try:
-        bedrock = boto3.client('bedrock-runtime', region_name=region)
+        bedrock = _client('bedrock-runtime', region)
         
         # Simple test prompt
         prompt = "Hello, this is a test message."
@@ -1,5 +1,6 @@
 import boto3
 import json
+import orjson
 
 agent_core_client = boto3.client('bedrock-agentcore', region_name='us-east-1')
 
@@ -21,8 +22,8 @@ try:
         qualifier="DEFAULT"
     )
     
-    response_body = response['response'].read()
-    response_data = json.loads(response_body)
+    # orjson parses the raw bytes directly, without decoding to str first
+    response_data = orjson.loads(response['response'].read())
     print("✅ SUCCESS!")
     print(f"Response: {response_data}")
     
@@ -5,60 +5,80 @@ Test the Twin System with different collaboration modes
 
 import json
 import asyncio
-import requests
+import httpx
 
-def test_twin_system_local():
+BASE_URL = "http://localhost:8080"
+
+# Model calls can take a while; only connecting should fail fast
+TIMEOUT = httpx.Timeout(300.0, connect=5.0)
+
+async def test_twin_system_local(client: httpx.AsyncClient):
     """Test the twin system locally"""
-    base_url = "http://localhost:8080"
     
     print("🚀 Testing AppBank Twin System Locally")
     print("=" * 80)
     print("🎯 Proof of Concept: Multi-Agent AI Collaboration System")
     print("=" * 80)
     
+    # Every conversation is independent, so they all run at once and are reported in order
+    agents_task = asyncio.create_task(test_list_agents(client))
+    utsav_task = asyncio.create_task(test_direct_communication(client, "utsav_fullstack", "What's the current AWS cost optimization strategy for AppBank? Please provide specific recommendations for our infrastructure."))
+    niyas_task = asyncio.create_task(test_direct_communication(client, "niyas_ai", "What AI models should we consider for our mobile app's recommendation system? Please provide technical details and implementation approach."))
+    orchestrated_task = asyncio.create_task(test_orchestrated_collaboration(client, "We need to build a new feature that combines mobile app development, database design, and AI capabilities. How should we approach this project and which team members should be involved?"))
+    ceo_task = asyncio.create_task(test_direct_communication(client, "owner_ceo", "Should we prioritize mobile app development or AI features for Q4? What's the business impact and ROI considerations for each approach?"))
+    
     # Test 1: List all agents
     print("\n📋 Test 1: List all agents")
-    try:
-        response = requests.get(f"{base_url}/agents")
-        if response.status_code == 200:
-            agents = response.json()
-            print("✅ Available AI Agents in AppBank Twin System:")
-            for agent in agents["agents"]:
-                print(f"  🤖 {agent['name']} ({agent['role']}) - {agent['memory_entries']} memory entries")
-                print(f"     Expertise: {', '.join(agent['expertise'])}")
-            print(f"\n📊 Total Agents: {len(agents['agents'])}")
-        else:
-            print(f"❌ Failed to get agents: {response.status_code}")
-    except Exception as e:
-        print(f"❌ Error: {e}")
+    print(await agents_task, end="")
     
     # Test 2: Direct communication with Utsav
     print("\n🎯 Test 2: Direct Agent Communication - Cloud Operations Expert")
     print("   Question: AWS cost optimization strategy for AppBank")
-    test_direct_communication(base_url, "utsav_fullstack", "What's the current AWS cost optimization strategy for AppBank? Please provide specific recommendations for our infrastructure.")
+    print(await utsav_task, end="")
     
     # Test 3: Direct communication with Niyas
     print("\n🎯 Test 3: Direct Agent Communication - AI Development Expert")
     print("   Question: AI models for mobile app recommendation system")
-    test_direct_communication(base_url, "niyas_ai", "What AI models should we consider for our mobile app's recommendation system? Please provide technical details and implementation approach.")
+    print(await niyas_task, end="")
     
     # Test 4: Orchestrated collaboration
     print("\n🤝 Test 4: Multi-Agent Orchestrated Collaboration")
     print("   Complex Request: Cross-functional feature development")
-    test_orchestrated_collaboration(base_url, "We need to build a new feature that combines mobile app development, database design, and AI capabilities. How should we approach this project and which team members should be involved?")
+    print(await orchestrated_task, end="")
     
     # Test 5: Business decision with Owner/CEO
     print("\n👑 Test 5: Executive Decision Making - Business Strategy")
     print("   Strategic Question: Q4 priorities and business impact")
-    test_direct_communication(base_url, "owner_ceo", "Should we prioritize mobile app development or AI features for Q4? What's the business impact and ROI considerations for each approach?")
+    print(await ceo_task, end="")
     
-    # Test 6: Check agent memories
+    # Test 6: Check agent memories (after the conversations above have been stored)
     print("\n💾 Test 6: Agent Memory Persistence")
     print("   Verifying conversation history storage")
-    test_agent_memories(base_url, "utsav_fullstack")
-    test_agent_memories(base_url, "team_coordinator")
+    memories = await asyncio.gather(
+        test_agent_memories(client, "utsav_fullstack"),
+        test_agent_memories(client, "team_coordinator")
+    )
+    print("".join(memories), end="")
 
-def test_direct_communication(base_url: str, agent_id: str, message: str):
+async def test_list_agents(client: httpx.AsyncClient) -> str:
+    """Test listing all agents"""
+    lines = []
+    try:
+        response = await client.get("/agents")
+        if response.status_code == 200:
+            agents = response.json()
+            lines.append("✅ Available AI Agents in AppBank Twin System:")
+            for agent in agents["agents"]:
+                lines.append(f"  🤖 {agent['name']} ({agent['role']}) - {agent['memory_entries']} memory entries")
+                lines.append(f"     Expertise: {', '.join(agent['expertise'])}")
+            lines.append(f"\n📊 Total Agents: {len(agents['agents'])}")
+        else:
+            lines.append(f"❌ Failed to get agents: {response.status_code}")
+    except Exception as e:
+        lines.append(f"❌ Error: {e}")
+    return "\n".join(lines) + "\n"
+
+async def test_direct_communication(client: httpx.AsyncClient, agent_id: str, message: str) -> str:
     """Test direct communication with a specific agent"""
     payload = {
         "user_message": message,
@@ -67,8 +87,9 @@ def test_direct_communication(base_url: str, agent_id: str, message: str):
         "context": {"test_mode": True}
     }
     
+    lines = []
     try:
-        response = requests.post(f"{base_url}/twin-system", json=payload)
+        response = await client.post("/twin-system", json=payload)
         if response.status_code == 200:
             result = response.json()
             agent_name = result["output"]["agent"]
@@ -76,18 +97,19 @@ def test_direct_communication(base_url: str, agent_id: str, message: str):
             response_text = result["output"]["message"]["content"][0]["text"]
             timestamp = result["output"].get("timestamp", "")
             
-            print(f"✅ {agent_name} ({agent_role}) responded:")
-            print("─" * 80)
-            print(f"{response_text}")
-            print("─" * 80)
-            print(f"⏰ Response time: {timestamp}")
-            print()
+            lines.append(f"✅ {agent_name} ({agent_role}) responded:")
+            lines.append("─" * 80)
+            lines.append(f"{response_text}")
+            lines.append("─" * 80)
+            lines.append(f"⏰ Response time: {timestamp}")
+            lines.append("")
         else:
-            print(f"❌ Failed: {response.status_code} - {response.text}")
+            lines.append(f"❌ Failed: {response.status_code} - {response.text}")
     except Exception as e:
-        print(f"❌ Error: {e}")
+        lines.append(f"❌ Error: {e}")
+    return "\n".join(lines) + "\n"
 
-def test_orchestrated_collaboration(base_url: str, message: str):
+async def test_orchestrated_collaboration(client: httpx.AsyncClient, message: str) -> str:
     """Test orchestrated collaboration through team coordinator"""
     payload = {
         "user_message": message,
@@ -95,38 +117,40 @@ def test_orchestrated_collaboration(base_url: str, message: str):
         "context": {"test_mode": True, "priority": "high"}
     }
     
+    lines = []
     try:
-        response = requests.post(f"{base_url}/twin-system", json=payload)
+        response = await client.post("/twin-system", json=payload)
         if response.status_code == 200:
             result = response.json()
             response_text = result["output"]["message"]["content"][0]["text"]
             timestamp = result["output"].get("timestamp", "")
             
-            print(f"✅ Team Coordinator orchestrated response:")
-            print("─" * 80)
-            print(f"{response_text}")
-            print("─" * 80)
-            print(f"⏰ Response time: {timestamp}")
-            print("🔗 Collaboration mode: Multi-agent orchestration")
-            print()
+            lines.append(f"✅ Team Coordinator orchestrated response:")
+            lines.append("─" * 80)
+            lines.append(f"{response_text}")
+            lines.append("─" * 80)
+            lines.append(f"⏰ Response time: {timestamp}")
+            lines.append("🔗 Collaboration mode: Multi-agent orchestration")
+            lines.append("")
         else:
-            print(f"❌ Failed: {response.status_code} - {response.text}")
+            lines.append(f"❌ Failed: {response.status_code} - {response.text}")
     except Exception as e:
-        print(f"❌ Error: {e}")
+        lines.append(f"❌ Error: {e}")
+    return "\n".join(lines) + "\n"
 
-def test_agent_memories(base_url: str, agent_id: str):
+async def test_agent_memories(client: httpx.AsyncClient, agent_id: str) -> str:
     """Test retrieving agent memories"""
     try:
-        response = requests.get(f"{base_url}/agent/{agent_id}/memory")
+        response = await client.get(f"/agent/{agent_id}/memory")
         if response.status_code == 200:
             memory = response.json()
-            print(f"✅ {memory['agent_name']} memory: {memory['memory_entries']} conversation entries stored")
+            return f"✅ {memory['agent_name']} memory: {memory['memory_entries']} conversation entries stored\n"
         else:
-            print(f"❌ Failed to get memory: {response.status_code}")
+            return f"❌ Failed to get memory: {response.status_code}\n"
     except Exception as e:
-        print(f"❌ Error: {e}")
+        return f"❌ Error: {e}\n"
 
-def test_standard_invocation(base_url: str):
+async def test_standard_invocation(client: httpx.AsyncClient):
     """Test standard Bedrock AgentCore invocation"""
     print("\n🔧 Test 7: Standard Bedrock AgentCore API Compatibility")
     print("   Testing backward compatibility with existing Bedrock integrations")
@@ -137,7 +161,7 @@ def test_standard_invocation(base_url: str):
     }
     
     try:
-        response = requests.post(f"{base_url}/invocations", json=payload)
+        response = await client.post("/invocations", json=payload)
         if response.status_code == 200:
             result = response.json()
             response_text = result["output"]["message"]["content"][0]["text"]
@@ -155,6 +179,13 @@ def test_standard_invocation(base_url: str):
     except Exception as e:
         print(f"❌ Error: {e}")
 
+async def main():
+    """Run the whole suite over one pooled keep-alive client"""
+    limits = httpx.Limits(max_connections=16, max_keepalive_connections=16, keepalive_expiry=60)
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=TIMEOUT, limits=limits) as client:
+        await test_twin_system_local(client)
+        await test_standard_invocation(client)
+
 if __name__ == "__main__":
     print("🧪 AppBank Twin System - Proof of Concept Demo")
     print("Make sure your twin system is running on localhost:8080")
@@ -163,8 +194,7 @@ if __name__ == "__main__":
     print("=" * 80)
     
     try:
-        test_twin_system_local()
-        test_standard_invocation("http://localhost:8080")
+        asyncio.run(main())
         
         print("\n" + "="*80)
         print("🎉 PROOF OF CONCEPT DEMONSTRATION COMPLETE!")
@@ -177,7 +207,7 @@ if __name__ == "__main__":
         print("\n💬 Ready for interactive demo!")
         print("   Run: python interactive_chat.py")
         print("="*80)
-        
+    
     except Exception as e:
         print(f"❌ Test suite failed: {e}")
         print("\n💡 Make sure to start your twin system first:")
@@ -1,37 +1,76 @@
 from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+from datetime import datetime, timezone
+from functools import lru_cache
 from strands import Agent
+from strands.models import BedrockModel
+from botocore.config import Config as BotocoreConfig
+import asyncio
 import logging
+import mmap
 import os
 import boto3
 from dotenv import load_dotenv
 import json
+import orjson
+import re
+import time
 import uuid
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count, islice
 from agent_learning import MemoryManager, LearningEngine
+from llm_cache import LLMCache
+from semantic_cache import Embedding, SemanticCache
 
 # Load environment variables
 load_dotenv()
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
+# LOG_LEVEL=WARNING in production keeps per-request logs off the hot path
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
+# Formatting a traceback walks every frame and reads source lines; under a burst of
+# failures (e.g. Bedrock throttling) that dominates CPU, so only one error log in
+# TRACEBACK_SAMPLE_RATE carries one
+TRACEBACK_SAMPLE_RATE = max(1, int(os.getenv("TRACEBACK_SAMPLE_RATE", "10")))
+_traceback_sampler = count()
+
+def sampled_exc_info() -> bool:
+    """exc_info flag for an error log: True for one call in TRACEBACK_SAMPLE_RATE"""
+    return next(_traceback_sampler) % TRACEBACK_SAMPLE_RATE == 0
+
+@lru_cache(maxsize=1)
+def _iso_timestamp(second: int) -> str:
+    """UTC ISO-8601 timestamp, formatted once per wall-clock second"""
+    return datetime.fromtimestamp(second, tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+def utc_timestamp() -> str:
+    """Current UTC timestamp for responses and memory entries"""
+    return _iso_timestamp(int(time.time()))
+
 # Configure AWS credentials
 os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
 
-app = FastAPI(title="AppBank Twin System", version="1.0.0")
+app = FastAPI(
+    title="AppBank Twin System",
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
 
 # Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
+CORS_OPTIONS = dict(
     allow_origins=["*"],  # In production, specify your frontend domain
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods (GET, POST, PUT, DELETE, OPTIONS, etc.)
     allow_headers=["*"],  # Allows all headers
 )
+app.add_middleware(CORSMiddleware, **CORS_OPTIONS)
 
 # Agent Registry
 AGENT_REGISTRY = {
@@ -73,24 +112,284 @@ AGENT_REGISTRY = {
     }
 }
 
-# Initialize agents with their own memories
-agents = {}
-for agent_id, config in AGENT_REGISTRY.items():
+@dataclass(slots=True, frozen=True)
+class AgentProfile:
+    """Registry entry as attributes, so request handlers skip the nested dict lookups"""
+    name: str
+    role: str
+    expertise: Tuple[str, ...]
+    system_prompt: str
+
+AGENT_PROFILES = {
+    agent_id: AgentProfile(
+        name=config["name"],
+        role=config["role"],
+        expertise=tuple(config["expertise"]),
+        system_prompt=config["system_prompt"]
+    )
+    for agent_id, config in AGENT_REGISTRY.items()
+}
+
+# Bounded pool for the blocking Bedrock stream that Strands hands off via
+# asyncio.to_thread; size it to the Bedrock concurrency we can sustain
+STRANDS_POOL = int(os.getenv("STRANDS_POOL", "32"))
+strands_executor = ThreadPoolExecutor(
+    max_workers=STRANDS_POOL,
+    thread_name_prefix="strands"
+)
+
+MODEL_ID = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+
+# Latency-optimized inference cuts time-to-first-token, but only for the models and
+# regions Bedrock offers it in; set BEDROCK_LATENCY_OPTIMIZED=1 where it is available
+BEDROCK_LATENCY_OPTIMIZED = os.getenv("BEDROCK_LATENCY_OPTIMIZED", "0") == "1"
+
+# Claude prompt caching for the static system prompts; set PROMPT_CACHE_TYPE=default
+# on models that support Bedrock cache points (Claude 3.5 Sonnet v2, 3.7, ...)
+PROMPT_CACHE_TYPE = os.getenv("PROMPT_CACHE_TYPE")
+
+# One Bedrock model (and client) shared by every agent, with a keep-alive
+# connection per executor thread so TLS handshakes are amortized
+bedrock_client_config = BotocoreConfig(
+    max_pool_connections=max(32, STRANDS_POOL),
+    retries={"mode": "adaptive", "max_attempts": 3},
+    connect_timeout=2,
+    read_timeout=60,
+    tcp_keepalive=True
+)
+
+bedrock_model = BedrockModel(
+    model_id=MODEL_ID,
+    boto_client_config=bedrock_client_config,
+    **({"cache_prompt": PROMPT_CACHE_TYPE} if PROMPT_CACHE_TYPE else {}),
+    **({"additional_args": {"performanceConfig": {"latency": "optimized"}}} if BEDROCK_LATENCY_OPTIMIZED else {})
+)
+
+# Exact-match response cache for stateless prompts. The agents sample at Bedrock's default
+# temperature, so it is off unless LLM_CACHE_TTL is set (only sensible at temperature 0)
+llm_cache = LLMCache(
+    maxsize=int(os.getenv("LLM_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("LLM_CACHE_TTL", "0"))
+)
+
+# Semantic cache for conversations: near-duplicate questions to the same agent (and user)
+# reuse the earlier answer. Embeddings come from Bedrock Titan, so it is opt-in; set
+# SEMANTIC_CACHE_THRESHOLD (cosine similarity, e.g. 0.95) to enable it
+EMBEDDING_MODEL_ID = os.getenv("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "256"))
+
+async def embed_text(text: str) -> List[float]:
+    """Embed a message with Titan over the shared Bedrock client"""
+    response = await asyncio.to_thread(
+        bedrock_model.client.invoke_model,
+        modelId=EMBEDDING_MODEL_ID,
+        body=orjson.dumps({"inputText": text, "dimensions": EMBEDDING_DIMENSIONS, "normalize": True})
+    )
+    return orjson.loads(response["body"].read())["embedding"]
+
+semantic_cache = SemanticCache(
+    embed=embed_text,
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0")),
+    maxsize=int(os.getenv("SEMANTIC_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+    max_scopes=int(os.getenv("SEMANTIC_CACHE_SCOPES", "256"))
+)
+
+# Agents with their own memories, built on first use so a worker only pays for the
+# agents it actually serves
+agents: Dict[str, Agent] = {}
+
+def _create_agent(agent_id: str, config: Dict[str, Any]) -> Optional[Agent]:
+    """Build one agent; failures are logged and retried on the next request"""
     try:
-        agents[agent_id] = Agent(
-            model="anthropic.claude-3-5-sonnet-20240620-v1:0",
+        agent = Agent(
+            model=bedrock_model,
             system_prompt=config["system_prompt"]
         )
         logger.info(f"✅ Initialized agent: {config['name']} ({agent_id})")
+        return agent
     except Exception as e:
         logger.error(f"❌ Failed to initialize agent {agent_id}: {e}")
+        return None
+
+def get_agent(agent_id: str) -> Optional[Agent]:
+    """Return the agent for agent_id, constructing it on first access; None if unknown or unavailable"""
+    agent = agents.get(agent_id)
+    if agent is None and agent_id in AGENT_REGISTRY:
+        agent = _create_agent(agent_id, AGENT_REGISTRY[agent_id])
+        if agent is not None:
+            agents[agent_id] = agent
+    return agent
+
+def new_agent(agent_id: str) -> Agent:
+    """Per-call agent with the registry prompt and the shared Bedrock model, for stateless prompts.
+    It carries no history, so concurrent calls never wait on each other."""
+    return Agent(
+        model=bedrock_model,
+        system_prompt=AGENT_PROFILES[agent_id].system_prompt
+    )
+
+# One turn at a time per shared agent keeps each agent's conversation history consistent
+agent_locks = {agent_id: asyncio.Lock() for agent_id in AGENT_REGISTRY}
+
+async def run_agent(agent_id: str, agent: Agent, prompt: str):
+    """Invoke a shared, stateful agent without blocking the event loop"""
+    async with agent_locks[agent_id]:
+        return await agent.invoke_async(prompt)
+
+async def stream_agent(agent_id: str, agent: Agent, prompt: str) -> AsyncIterator[str]:
+    """Yield an agent's reply text as Bedrock produces it"""
+    async with agent_locks[agent_id]:
+        async for event in agent.stream_async(prompt):
+            if "data" in event:
+                yield event["data"]
+
+def response_cache_key(agent_id: str, prompt: str) -> str:
+    """Cache key for one agent's answer to a prompt"""
+    return LLMCache.make_key(MODEL_ID, AGENT_PROFILES[agent_id].system_prompt, prompt)
+
+async def ask_agent(agent_id: str, prompt: str) -> str:
+    """Answer a stateless prompt on a per-call agent, from the response cache when the same
+    prompt was just served. Turns on shared agents are never cached: their answers depend
+    on the conversation history, and a cached answer would skip that history."""
+    if not llm_cache.enabled:
+        return extract_response_text(await new_agent(agent_id).invoke_async(prompt))
+    
+    cache_key = response_cache_key(agent_id, prompt)
+    message_text = await llm_cache.get(cache_key)
+    if message_text is not None:
+        logger.info("⚡ Served %s response from LLM cache", AGENT_PROFILES[agent_id].name)
+        return message_text
+    
+    message_text = extract_response_text(await new_agent(agent_id).invoke_async(prompt))
+    await llm_cache.set(cache_key, message_text)
+    return message_text
 
 # Initialize enhanced memory and learning systems
 memory_manager = MemoryManager(use_aws_memory=True)
 learning_engine = LearningEngine(memory_manager)
 
-# Legacy memory store for backward compatibility
-agent_memories = {agent_id: [] for agent_id in AGENT_REGISTRY.keys()}
+# Static part of the /agents listing, built once from the registry
+AGENT_LISTING = [
+    {
+        "id": agent_id,
+        "name": config["name"],
+        "role": config["role"],
+        "expertise": config["expertise"]
+    }
+    for agent_id, config in AGENT_REGISTRY.items()
+]
+AGENT_LISTING_MESSAGE = f"Retrieved {len(AGENT_LISTING)} available agents"
+
+# Per-agent fields every agent reply carries
+RESPONSE_SCAFFOLDS = {
+    agent_id: {"model": f"twin-system-{agent_id}", "agent": config["name"], "role": config["role"]}
+    for agent_id, config in AGENT_REGISTRY.items()
+}
+
+# Legacy memory store for backward compatibility; each agent keeps its last MEMORY_LIMIT entries
+# (in production, use AWS Bedrock Memory)
+MEMORY_LIMIT = 100
+agent_memories = {agent_id: deque(maxlen=MEMORY_LIMIT) for agent_id in AGENT_REGISTRY}
+# Entry ids are "<worker id>-<per-agent number>": cheaper than a random UUID per entry, and
+# unique across restarts and across uvicorn workers appending to the same log
+WORKER_ID = os.urandom(4).hex()
+memory_sequence = {agent_id: count(1) for agent_id in AGENT_REGISTRY}
+
+# Every entry is also appended to memory/<agent_id>.jsonl so history survives restarts.
+# Workers share the log; each line is one O_APPEND write, so lines never interleave
+MEMORY_DIR = os.path.abspath(os.getenv(
+    "AGENT_MEMORY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory")
+))
+memory_logs = {}
+# Appends run on one background thread, in order, so the event loop never waits on the disk
+memory_log_writer: Optional[ThreadPoolExecutor] = None
+
+def _tail_lines(path: str, limit: int) -> List[bytes]:
+    """Return the last `limit` lines of a file without reading the whole thing"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            end = len(mapped)
+            if mapped[end - 1:end] == b"\n":
+                end -= 1
+            lines = []
+            while end > 0 and len(lines) < limit:
+                start = mapped.rfind(b"\n", 0, end) + 1
+                lines.append(mapped[start:end])
+                end = start - 1
+    lines.reverse()
+    return lines
+
+def _load_memory_log(agent_id: str):
+    """Reload an agent's most recent entries and open its log for appending"""
+    path = os.path.join(MEMORY_DIR, f"{agent_id}.jsonl")
+    if os.path.exists(path):
+        for line in _tail_lines(path, MEMORY_LIMIT):
+            try:
+                agent_memories[agent_id].append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                logger.warning(f"⚠️ Skipping unreadable memory entry for {agent_id}")
+    memory_logs[agent_id] = open(path, "ab", buffering=0)
+
+@app.on_event("startup")
+async def open_memory_logs():
+    """Restore persisted agent memories and open their append-only logs"""
+    global memory_log_writer
+    os.makedirs(MEMORY_DIR, exist_ok=True)
+    memory_log_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-log")
+    for agent_id in AGENT_REGISTRY:
+        _load_memory_log(agent_id)
+    logger.info(f"💾 Restored {sum(map(len, agent_memories.values()))} memory entries from {MEMORY_DIR}/")
+
+@app.on_event("shutdown")
+async def close_memory_logs():
+    """Finish pending appends and close the per-agent memory logs"""
+    global memory_log_writer
+    if memory_log_writer is not None:
+        await asyncio.to_thread(memory_log_writer.shutdown, wait=True)
+        memory_log_writer = None
+    for memory_log in memory_logs.values():
+        memory_log.close()
+    memory_logs.clear()
+
+# Background learning runs after the reply is sent; the semaphore keeps a burst of
+# conversations from tying up every executor thread with analysis
+learning_semaphore = asyncio.Semaphore(int(os.getenv("LEARNING_CONCURRENCY", "16")))
+learning_tasks = set()
+
+async def _learn_in_background(**kwargs):
+    """Run the learning analysis off the request path, logging rather than raising failures"""
+    try:
+        async with learning_semaphore:
+            # MemoryManager batches the resulting writes on its own write-behind thread
+            await asyncio.to_thread(learning_engine.learn_from_conversation, **kwargs)
+    except Exception as e:
+        logger.error(f"❌ Background learning failed for {kwargs.get('agent_id')}: {e}")
+
+def schedule_learning(**kwargs):
+    """Queue learning from a finished conversation without delaying the response"""
+    task = asyncio.create_task(_learn_in_background(**kwargs))
+    learning_tasks.add(task)
+    task.add_done_callback(learning_tasks.discard)
+
+@app.on_event("shutdown")
+async def drain_learning():
+    """Let queued learning finish and write out its memories before the worker exits"""
+    if learning_tasks:
+        await asyncio.gather(*learning_tasks, return_exceptions=True)
+    await asyncio.to_thread(memory_manager.flush)
+
+@app.on_event("startup")
+async def configure_executor():
+    """Route Strands' blocking Bedrock streams through the bounded executor"""
+    asyncio.get_running_loop().set_default_executor(strands_executor)
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    """Let in-flight model calls finish before the worker exits"""
+    strands_executor.shutdown(wait=True)
 
 class InvocationRequest(BaseModel):
     input: Dict[str, Any]
@@ -124,7 +423,7 @@ def create_success_response(message: str, data: Optional[Dict[str, Any]] = None)
         status="success",
         message=message,
         data=data,
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utc_timestamp()
     )
 
 def create_error_response(message: str, data: Optional[Dict[str, Any]] = None) -> StandardResponse:
@@ -133,15 +432,15 @@ def create_error_response(message: str, data: Optional[Dict[str, Any]] = None) -
         status="error",
         message=message,
         data=data,
-        timestamp=datetime.utcnow().isoformat()
+        timestamp=utc_timestamp()
     )
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log all incoming requests for debugging"""
-    logger.info(f"🔍 Incoming request: {request.method} {request.url}")
+    logger.info("🔍 Incoming request: %s %s", request.method, request.url)
     response = await call_next(request)
-    logger.info(f"🔍 Response status: {response.status_code}")
+    logger.info("🔍 Response status: %d", response.status_code)
     return response
 
 @app.post("/invocations", response_model=InvocationResponse)
@@ -159,12 +458,23 @@ async def twin_system_invoke(request: TwinSystemRequest):
             data=result.output
         )
     except Exception as e:
-        logger.error(f"❌ Twin system endpoint error: {e}", exc_info=True)
+        logger.error(f"❌ Twin system endpoint error: {e}", exc_info=sampled_exc_info())
         return create_error_response(
             message=f"Twin system collaboration failed: {str(e)}",
             data={"target_agent": request.target_agent, "collaboration_mode": request.collaboration_mode}
         )
 
+@app.post("/twin-system/stream")
+async def twin_system_stream(request: TwinSystemRequest):
+    """Twin system endpoint that streams the reply as NDJSON so clients can render it while it is generated"""
+    if request.collaboration_mode == "direct" and request.target_agent:
+        if get_agent(request.target_agent) is None:
+            raise HTTPException(status_code=400, detail=f"Agent {request.target_agent} not found")
+        events = stream_direct_communication(request.target_agent, request.user_message, request.context)
+    else:
+        events = stream_orchestrated_collaboration(request.user_message, request.context)
+    return StreamingResponse(events, media_type="application/x-ndjson")
+
 @app.post("/conversation", response_model=StandardResponse)
 async def conversation_endpoint(request: ConversationRequest):
     """Enhanced conversation endpoint with learning"""
@@ -187,39 +497,105 @@ async def conversation_endpoint(request: ConversationRequest):
             data={"agent_id": request.agent_id, "user_id": request.user_id}
         )
     except Exception as e:
-        logger.error(f"❌ Conversation endpoint error: {e}", exc_info=True)
+        logger.error(f"❌ Conversation endpoint error: {e}", exc_info=sampled_exc_info())
         return create_error_response(
             message=f"Conversation failed: {str(e)}",
             data={"agent_id": request.agent_id, "user_id": request.user_id}
         )
 
+@app.post("/conversation/stream")
+async def conversation_stream(request: ConversationRequest):
+    """Conversation endpoint that streams the reply as NDJSON, like /twin-system/stream"""
+    if get_agent(request.agent_id) is None:
+        raise HTTPException(status_code=400, detail=f"Agent {request.agent_id} not found")
+    
+    async def events():
+        try:
+            async for item in stream_conversation_request(request):
+                if isinstance(item, str):
+                    yield ndjson({"type": "chunk", "text": item})
+                else:
+                    yield ndjson({"type": "done", **{key: value for key, value in item.items() if key != "message"}})
+        except HTTPException as e:
+            yield ndjson({"type": "error", "message": e.detail})
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+# Pending replies allowed per WebSocket before the server stops reading new messages
+WEBSOCKET_MAX_INFLIGHT = int(os.getenv("WEBSOCKET_MAX_INFLIGHT", "4"))
+
 @app.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
-    """WebSocket for real-time messaging"""
+    """WebSocket for real-time messaging; messages on one socket are answered concurrently"""
     await websocket.accept()
     logger.info(f"🔌 WebSocket connected for user: {user_id}")
     
-    try:
-        while True:
-            data = await websocket.receive_text()
-            message_data = json.loads(data)
-            
-            # Process message through twin system
-            response = await handle_conversation_request(ConversationRequest(
+    # Starlette WebSockets are not safe for concurrent sends, and the semaphore stops
+    # reading new frames once WEBSOCKET_MAX_INFLIGHT replies are pending
+    send_lock = asyncio.Lock()
+    inflight = asyncio.Semaphore(WEBSOCKET_MAX_INFLIGHT)
+    tasks = set()
+    
+    async def send(payload: Dict[str, Any]):
+        async with send_lock:
+            await websocket.send_text(orjson.dumps(payload).decode())
+    
+    async def process_and_send(message_data: Dict[str, Any]):
+        try:
+            conversation = ConversationRequest(
                 message=message_data.get("message", ""),
                 agent_id=message_data.get("agent_id", "team_coordinator"),
                 user_id=user_id,
                 conversation_id=message_data.get("conversation_id")
-            ))
+            )
             
-            # Send response back
-            await websocket.send_text(json.dumps(response.output))
+            # Process message through twin system; with "stream": true the text is sent
+            # as {"type": "chunk"} frames while it is generated, before the full reply
+            if message_data.get("stream"):
+                async for item in stream_conversation_request(conversation):
+                    if isinstance(item, str):
+                        chunk = {"type": "chunk", "text": item}
+                        if "request_id" in message_data:
+                            chunk["request_id"] = message_data["request_id"]
+                        await send(chunk)
+                    else:
+                        reply = item
+            else:
+                reply = (await handle_conversation_request(conversation)).output
+        except Exception as e:
+            logger.error(f"❌ WebSocket message failed: {e}")
+            reply = {"error": str(e.detail if isinstance(e, HTTPException) else e)}
+        finally:
+            inflight.release()
+        
+        # Replies can overtake each other, so echo the client's request_id for matching
+        if "request_id" in message_data:
+            reply = {**reply, "request_id": message_data["request_id"]}
+        
+        # Send response back; the client may have gone while the reply was generated
+        try:
+            await send(reply)
+        except (WebSocketDisconnect, RuntimeError) as e:
+            logger.info("🔌 Dropped reply for %s, WebSocket closed: %s", user_id, e)
+    
+    try:
+        while True:
+            data = await websocket.receive_text()
+            message_data = orjson.loads(data)
+            
+            await inflight.acquire()
+            task = asyncio.create_task(process_and_send(message_data))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
             
     except WebSocketDisconnect:
         logger.info(f"🔌 WebSocket disconnected for user: {user_id}")
     except Exception as e:
         logger.error(f"❌ WebSocket error: {e}")
         await websocket.close()
+    finally:
+        for task in tasks:
+            task.cancel()
 
 async def invoke_agent_logic(request: InvocationRequest):
     """Handle standard agent invocations"""
@@ -228,18 +604,13 @@ async def invoke_agent_logic(request: InvocationRequest):
         if not user_message:
             raise HTTPException(status_code=400, detail="No prompt found in input")
         
-        # Default to team coordinator for general requests
+        # Default to team coordinator for general requests; each invocation is a
+        # standalone prompt, so it runs on its own agent instead of the shared one
         agent_id = "team_coordinator"
-        agent = agents.get(agent_id)
-        
-        if not agent:
-            raise HTTPException(status_code=500, detail=f"Agent {agent_id} not available")
-        
-        logger.info(f"🤖 {AGENT_REGISTRY[agent_id]['name']} processing: {user_message}")
-        result = agent(user_message)
         
-        # Extract response text
-        message_text = extract_response_text(result)
+        logger.info("🤖 %s processing a %d-character prompt", AGENT_PROFILES[agent_id].name, len(user_message))
+        logger.debug("Prompt: %s", user_message)
+        message_text = await ask_agent(agent_id, user_message)
         
         # Store in agent memory
         store_in_memory(agent_id, user_message, message_text)
@@ -249,14 +620,14 @@ async def invoke_agent_logic(request: InvocationRequest):
                 "role": "assistant",
                 "content": [{"text": message_text}]
             },
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": utc_timestamp(),
             "model": f"twin-system-{agent_id}"
         }
         
         return InvocationResponse(output=response)
         
     except Exception as e:
-        logger.error(f"❌ Error in invoke_agent_logic: {e}", exc_info=True)
+        logger.error(f"❌ Error in invoke_agent_logic: {e}", exc_info=sampled_exc_info())
         raise HTTPException(status_code=500, detail=f"Agent processing failed: {str(e)}")
 
 async def handle_twin_system_request(request: TwinSystemRequest):
@@ -266,9 +637,11 @@ async def handle_twin_system_request(request: TwinSystemRequest):
         target_agent = request.target_agent
         collaboration_mode = request.collaboration_mode
         
-        logger.info(f"🤖 Twin System Request: {user_message}")
-        logger.info(f"🎯 Target Agent: {target_agent or 'Team Coordinator'}")
-        logger.info(f"🔗 Collaboration Mode: {collaboration_mode}")
+        logger.info(
+            "🤖 Twin System Request: target=%s mode=%s (%d characters)",
+            target_agent or 'Team Coordinator', collaboration_mode, len(user_message)
+        )
+        logger.debug("Prompt: %s", user_message)
         
         if collaboration_mode == "direct" and target_agent:
             # Direct agent-to-agent communication
@@ -280,96 +653,159 @@ async def handle_twin_system_request(request: TwinSystemRequest):
         return InvocationResponse(output=response)
         
     except Exception as e:
-        logger.error(f"❌ Error in twin system: {e}", exc_info=True)
+        logger.error(f"❌ Error in twin system: {e}", exc_info=sampled_exc_info())
         raise HTTPException(status_code=500, detail=f"Twin system failed: {str(e)}")
 
+async def prepare_conversation(request: ConversationRequest):
+    """Build the per-conversation agent and the message it should answer"""
+    agent_id = request.agent_id
+    
+    if get_agent(agent_id) is None:
+        raise HTTPException(status_code=400, detail=f"Agent {agent_id} not found")
+    
+    agent_config = AGENT_PROFILES[agent_id]
+    
+    # Get learned personality and context for this user
+    learned_context = await asyncio.to_thread(
+        learning_engine.get_learned_context,
+        agent_id=agent_id,
+        user_id=request.user_id
+    )
+    
+    # The system prompt stays the static registry prompt so Bedrock can reuse its cached
+    # prefix; the per-user learned context travels with the message instead
+    enhanced_agent = Agent(
+        model=bedrock_model,
+        system_prompt=agent_config.system_prompt
+    )
+    enhanced_message = f"{learned_context.strip()}\n\n## User Message:\n{request.message}" if learned_context else request.message
+    
+    logger.info("🤖 Enhanced conversation with %s", agent_config.name)
+    logger.debug("Prompt: %s", request.message)
+    
+    return enhanced_agent, enhanced_message
+
+def complete_conversation(request: ConversationRequest, message_text: str) -> Dict[str, Any]:
+    """Learn from and store a finished conversation turn, and build its reply"""
+    agent_id = request.agent_id
+    
+    # Learn from the conversation if enabled; the reply does not wait for it
+    if request.user_id:  # Only learn if we have a user_id
+        schedule_learning(
+            agent_id=agent_id,
+            user_message=request.message,
+            agent_response=message_text,
+            user_id=request.user_id,
+            conversation_context={
+                "conversation_id": request.conversation_id,
+                "timestamp": utc_timestamp()
+            }
+        )
+    
+    # Store in both new and legacy memory systems
+    store_in_memory(agent_id, request.message, message_text)
+    
+    return {
+        "message": {
+            "role": "assistant",
+            "content": [{"text": message_text}]
+        },
+        "timestamp": utc_timestamp(),
+        **RESPONSE_SCAFFOLDS[agent_id],
+        "conversation_id": request.conversation_id or str(uuid.uuid4()),
+        "learning_enabled": bool(request.user_id)
+    }
+
+async def lookup_semantic_cache(request: ConversationRequest) -> Tuple[Optional[str], Optional[Embedding]]:
+    """Cached answer to a near-duplicate of this message, plus its embedding for storing a miss"""
+    if not semantic_cache.enabled:
+        return None, None
+    try:
+        # Replies carry the user's learned context, so they are only shared within one user
+        message_text, embedding = await semantic_cache.get((request.agent_id, request.user_id), request.message)
+    except Exception as e:
+        logger.warning(f"⚠️ Semantic cache lookup failed: {e}")
+        return None, None
+    if message_text is not None:
+        logger.info("⚡ Served %s conversation from semantic cache", AGENT_PROFILES[request.agent_id].name)
+    return message_text, embedding
+
+async def store_semantic_cache(request: ConversationRequest, message_text: str, embedding: Optional[Embedding]):
+    """Remember a freshly generated answer for similar follow-up questions"""
+    if embedding is not None and message_text:
+        await semantic_cache.set((request.agent_id, request.user_id), request.message, message_text, embedding)
+
 async def handle_conversation_request(request: ConversationRequest):
     """Handle enhanced conversation with learning capabilities"""
     try:
-        agent_id = request.agent_id
-        user_message = request.message
-        user_id = request.user_id
-        
-        if agent_id not in agents:
-            raise HTTPException(status_code=400, detail=f"Agent {agent_id} not found")
+        if get_agent(request.agent_id) is None:
+            raise HTTPException(status_code=400, detail=f"Agent {request.agent_id} not found")
         
-        agent = agents[agent_id]
-        agent_config = AGENT_REGISTRY[agent_id]
+        message_text, embedding = await lookup_semantic_cache(request)
+        if message_text is None:
+            enhanced_agent, enhanced_message = await prepare_conversation(request)
+            
+            # Get agent response
+            result = await enhanced_agent.invoke_async(enhanced_message)
+            message_text = extract_response_text(result)
+            await store_semantic_cache(request, message_text, embedding)
         
-        # Get enhanced system prompt with learning
-        base_prompt = agent_config["system_prompt"]
-        enhanced_prompt = learning_engine.get_enhanced_system_prompt(
-            agent_id=agent_id,
-            base_prompt=base_prompt,
-            user_id=user_id
-        )
+        return InvocationResponse(output=complete_conversation(request, message_text))
         
-        # Create temporary agent with enhanced prompt
-        enhanced_agent = Agent(
-            model="anthropic.claude-3-5-sonnet-20240620-v1:0",
-            system_prompt=enhanced_prompt
-        )
+    except Exception as e:
+        logger.error(f"❌ Error in conversation: {e}", exc_info=sampled_exc_info())
+        raise HTTPException(status_code=500, detail=f"Conversation failed: {str(e)}")
+
+async def stream_conversation_request(request: ConversationRequest) -> AsyncIterator[Any]:
+    """Like handle_conversation_request, but yields text chunks as they arrive and then the full reply dict"""
+    try:
+        if get_agent(request.agent_id) is None:
+            raise HTTPException(status_code=400, detail=f"Agent {request.agent_id} not found")
         
-        logger.info(f"🤖 Enhanced conversation with {agent_config['name']}: {user_message}")
+        message_text, embedding = await lookup_semantic_cache(request)
+        if message_text is not None:
+            yield message_text
+            yield complete_conversation(request, message_text)
+            return
         
-        # Get agent response
-        result = enhanced_agent(user_message)
-        message_text = extract_response_text(result)
+        enhanced_agent, enhanced_message = await prepare_conversation(request)
         
-        # Learn from the conversation if enabled
-        if request.user_id:  # Only learn if we have a user_id
-            learning_engine.learn_from_conversation(
-                agent_id=agent_id,
-                user_message=user_message,
-                agent_response=message_text,
-                user_id=user_id,
-                conversation_context={
-                    "conversation_id": request.conversation_id,
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-            )
+        chunks = []
+        async for event in enhanced_agent.stream_async(enhanced_message):
+            if "data" in event:
+                chunks.append(event["data"])
+                yield event["data"]
         
-        # Store in both new and legacy memory systems
-        store_in_memory(agent_id, user_message, message_text)
-        
-        response = {
-            "message": {
-                "role": "assistant",
-                "content": [{"text": message_text}]
-            },
-            "timestamp": datetime.utcnow().isoformat(),
-            "model": f"twin-system-{agent_id}",
-            "agent": agent_config['name'],
-            "role": agent_config['role'],
-            "conversation_id": request.conversation_id or str(uuid.uuid4()),
-            "learning_enabled": bool(request.user_id)
-        }
-        
-        return InvocationResponse(output=response)
+        message_text = "".join(chunks)
+        await store_semantic_cache(request, message_text, embedding)
+        yield complete_conversation(request, message_text)
         
     except Exception as e:
-        logger.error(f"❌ Error in conversation: {e}", exc_info=True)
+        logger.error(f"❌ Error in streaming conversation: {e}", exc_info=sampled_exc_info())
         raise HTTPException(status_code=500, detail=f"Conversation failed: {str(e)}")
 
+def with_context(message: str, context: Optional[Dict] = None) -> str:
+    """Append the request context to a prompt"""
+    if context:
+        return f"{message}\n\nContext: {orjson.dumps(context).decode()}"
+    return message
+
 async def direct_agent_communication(agent_id: str, message: str, context: Optional[Dict] = None):
     """Direct communication with a specific agent"""
-    if agent_id not in agents:
+    agent = get_agent(agent_id)
+    if agent is None:
         raise HTTPException(status_code=400, detail=f"Agent {agent_id} not found")
     
-    agent = agents[agent_id]
-    agent_config = AGENT_REGISTRY[agent_id]
+    agent_config = AGENT_PROFILES[agent_id]
     
     # Add context to the message if provided
-    if context:
-        enhanced_message = f"{message}\n\nContext: {json.dumps(context, indent=2)}"
-    else:
-        enhanced_message = message
+    enhanced_message = with_context(message, context)
     
-    logger.info(f"🤖 Direct communication with {agent_config['name']}: {enhanced_message}")
+    logger.info("🤖 Direct communication with %s", agent_config.name)
+    logger.debug("Prompt: %s", enhanced_message)
     
     try:
-        result = agent(enhanced_message)
-        message_text = extract_response_text(result)
+        message_text = extract_response_text(await run_agent(agent_id, agent, enhanced_message))
         
         # Store in agent memory
         store_in_memory(agent_id, enhanced_message, message_text)
@@ -379,10 +815,8 @@ async def direct_agent_communication(agent_id: str, message: str, context: Optio
                 "role": "assistant",
                 "content": [{"text": message_text}]
             },
-            "timestamp": datetime.utcnow().isoformat(),
-            "model": f"twin-system-{agent_id}",
-            "agent": agent_config['name'],
-            "role": agent_config['role']
+            "timestamp": utc_timestamp(),
+            **RESPONSE_SCAFFOLDS[agent_id]
         }
         
         return response
@@ -391,26 +825,94 @@ async def direct_agent_communication(agent_id: str, message: str, context: Optio
         logger.error(f"❌ Direct communication failed: {e}")
         raise HTTPException(status_code=500, detail=f"Direct communication failed: {str(e)}")
 
-async def orchestrated_collaboration(message: str, context: Optional[Dict] = None):
-    """Use team coordinator to orchestrate multi-agent collaboration"""
-    coordinator = agents.get("team_coordinator")
-    if not coordinator:
-        raise HTTPException(status_code=500, detail="Team coordinator not available")
+def ndjson(event: Dict[str, Any]) -> bytes:
+    """Encode one streaming event as a newline-delimited JSON line"""
+    return orjson.dumps(event) + b"\n"
+
+async def stream_direct_communication(agent_id: str, message: str, context: Optional[Dict] = None) -> AsyncIterator[bytes]:
+    """Stream a direct agent reply chunk by chunk, then store it like direct_agent_communication does"""
+    agent = get_agent(agent_id)
+    agent_config = AGENT_PROFILES[agent_id]
+    enhanced_message = with_context(message, context)
     
-    # Create orchestration prompt
-    orchestration_prompt = f"""
-    As the Team Coordinator at AppBank, analyze this request and determine the best approach:
+    logger.info("🤖 Streaming direct communication with %s", agent_config.name)
+    logger.debug("Prompt: %s", enhanced_message)
+    
+    try:
+        chunks = []
+        async for text in stream_agent(agent_id, agent, enhanced_message):
+            chunks.append(text)
+            yield ndjson({"type": "chunk", "text": text})
+        message_text = "".join(chunks)
+        
+        # Store in agent memory
+        store_in_memory(agent_id, enhanced_message, message_text)
+        
+        yield ndjson({
+            "type": "done",
+            "timestamp": utc_timestamp(),
+            **RESPONSE_SCAFFOLDS[agent_id]
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Streaming direct communication failed: {e}")
+        yield ndjson({"type": "error", "message": f"Direct communication failed: {str(e)}"})
+
+async def stream_orchestrated_collaboration(message: str, context: Optional[Dict] = None) -> AsyncIterator[bytes]:
+    """Orchestrated replies merge several agents, so they are sent as one chunk once complete"""
+    try:
+        response = await orchestrated_collaboration(message, context)
+    except HTTPException as e:
+        yield ndjson({"type": "error", "message": e.detail})
+        return
+    
+    yield ndjson({"type": "chunk", "text": response["message"]["content"][0]["text"]})
+    yield ndjson({"type": "done", **{key: value for key, value in response.items() if key != "message"}})
+
+# Specialists the coordinator can delegate to, and how many may answer at once
+SPECIALIST_IDS = [agent_id for agent_id in AGENT_REGISTRY if agent_id != "team_coordinator"]
+specialist_semaphore = asyncio.Semaphore(int(os.getenv("SPECIALIST_CONCURRENCY", "8")))
+ROUTING_JSON_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+
+# Coordinator prompts are built once from the registry; only the request fields vary per call
+TEAM_MEMBERS = "\n".join(
+    f"    - {agent_id}: {AGENT_PROFILES[agent_id].name} ({AGENT_PROFILES[agent_id].role}): {', '.join(AGENT_PROFILES[agent_id].expertise)}"
+    for agent_id in SPECIALIST_IDS
+)
+
+ROUTING_PROMPT_TEMPLATE = f"""
+    As the Team Coordinator at AppBank, decide which team member(s) should handle this request.
+    
+    User Request: {{message}}
+    
+    Available Team Members:
+{TEAM_MEMBERS}
+    
+    Context: {{context}}
+    
+    Reply with JSON only, for example: {{{{"agents": ["niyas_ai", "karti_database"]}}}}
+    """
+
+MERGE_PROMPT_TEMPLATE = """
+    As the Team Coordinator at AppBank, combine your team's answers into one coordinated response.
     
     User Request: {message}
     
+    Team Answers:
+    {team_answers}
+    
+    Please provide a coordinated response and suggest next steps if multiple agents need to collaborate.
+    """
+
+ORCHESTRATION_PROMPT_TEMPLATE = f"""
+    As the Team Coordinator at AppBank, analyze this request and determine the best approach:
+    
+    User Request: {{message}}
+    
     Available Team Members:
-    - Nayeem (Mobile App Developer): iOS, Android, React Native
-    - Karti (Database Developer): PostgreSQL, MongoDB, Redis, Data Modeling
-    - Niyas (AI Developer): Machine Learning, NLP, Computer Vision, MLOps
-    - Utsav (Full Stack & Cloud Ops): AWS, DevOps, Backend, Infrastructure
-    - Owner/CEO: Business Strategy, Product Direction, Leadership
+{TEAM_MEMBERS}
     
-    Context: {context or 'No additional context provided'}
+    Context: {{context}}
     
     Please:
     1. Analyze the request
@@ -420,9 +922,66 @@ async def orchestrated_collaboration(message: str, context: Optional[Dict] = Non
     
     Respond as the Team Coordinator coordinating the team.
     """
+
+def parse_routing(text: str) -> List[str]:
+    """Pull the picked specialist ids out of the coordinator's routing reply"""
+    match = ROUTING_JSON_PATTERN.search(text)
+    if not match:
+        return []
+    try:
+        picked = json.loads(match.group()).get("agents", [])
+    except (ValueError, AttributeError):
+        return []
+    return [agent_id for agent_id in dict.fromkeys(picked) if agent_id in SPECIALIST_IDS]
+
+async def ask_specialist(agent_id: str, prompt: str) -> Optional[str]:
+    """Get one specialist's answer and keep it in that specialist's memory; None if it failed"""
+    try:
+        async with specialist_semaphore:
+            result = await new_agent(agent_id).invoke_async(prompt)
+    except Exception as e:
+        # A failed specialist must not cancel the others in the task group
+        logger.error(f"❌ {AGENT_PROFILES[agent_id].name} failed during orchestration: {e}")
+        return None
+    message_text = extract_response_text(result)
+    store_in_memory(agent_id, prompt, message_text)
+    return message_text
+
+async def orchestrated_collaboration(message: str, context: Optional[Dict] = None):
+    """Use team coordinator to route the request, ask the picked specialists in parallel and merge their answers"""
+    # Routing, specialist and merge prompts are self-contained, so each runs on a per-call
+    # agent and concurrent orchestrations do not queue behind one shared agent
+    # Phase 1: the coordinator only picks who should answer
+    routing_prompt = ROUTING_PROMPT_TEMPLATE.format(message=message, context=context or 'No additional context provided')
     
     try:
-        result = coordinator(orchestration_prompt)
+        routing = await ask_agent("team_coordinator", routing_prompt)
+        picked = parse_routing(routing)
+        logger.info("🧭 Coordinator routed request to: %s", ", ".join(picked) or "nobody")
+        
+        # Phase 2: the picked specialists answer concurrently
+        specialist_prompt = with_context(message, context)
+        # The task group cancels every specialist call if this request is cancelled
+        async with asyncio.TaskGroup() as task_group:
+            answers = [task_group.create_task(ask_specialist(agent_id, specialist_prompt)) for agent_id in picked]
+        
+        contributions = [
+            (agent_id, answer.result())
+            for agent_id, answer in zip(picked, answers)
+            if answer.result() is not None
+        ]
+        
+        # Phase 3: the coordinator merges the answers (or answers alone if nobody could)
+        if contributions:
+            team_answers = "\n\n".join(
+                f"{AGENT_PROFILES[agent_id].name} ({AGENT_PROFILES[agent_id].role}):\n{answer}"
+                for agent_id, answer in contributions
+            )
+            orchestration_prompt = MERGE_PROMPT_TEMPLATE.format(message=message, team_answers=team_answers)
+        else:
+            orchestration_prompt = ORCHESTRATION_PROMPT_TEMPLATE.format(message=message, context=context or 'No additional context provided')
+        
+        result = await new_agent("team_coordinator").invoke_async(orchestration_prompt)
         message_text = extract_response_text(result)
         
         # Store in coordinator memory
@@ -433,11 +992,16 @@ async def orchestrated_collaboration(message: str, context: Optional[Dict] = Non
                 "role": "assistant",
                 "content": [{"text": message_text}]
             },
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": utc_timestamp(),
             "model": "twin-system-coordinator",
             "agent": "Team Coordinator",
             "role": "Orchestrator",
-            "collaboration_mode": "orchestrated"
+            "collaboration_mode": "orchestrated",
+            "contributors": [AGENT_PROFILES[agent_id].name for agent_id, _ in contributions],
+            "team_responses": [
+                {"agent_id": agent_id, "agent": AGENT_PROFILES[agent_id].name, "role": AGENT_PROFILES[agent_id].role, "text": answer}
+                for agent_id, answer in contributions
+            ]
         }
         
         return response
@@ -448,56 +1012,104 @@ async def orchestrated_collaboration(message: str, context: Optional[Dict] = Non
 
 def extract_response_text(result):
     """Extract text from strands response"""
-    if isinstance(result.message, dict) and 'content' in result.message:
-        content = result.message['content']
-        if content and isinstance(content[0], dict) and 'text' in content[0]:
-            return content[0]['text']
-        else:
-            return str(content)
-    else:
-        return str(result.message)
+    message = result.message
+    # Strands replies are almost always {'content': [{'text': ...}]}, so try that shape first
+    try:
+        return message['content'][0]['text']
+    except (KeyError, IndexError, TypeError):
+        if isinstance(message, dict) and 'content' in message:
+            return str(message['content'])
+        return str(message)
 
 def store_in_memory(agent_id: str, input_message: str, response_message: str):
     """Store conversation in agent memory"""
     memory_entry = {
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": utc_timestamp(),
         "input": input_message,
         "response": response_message,
-        "session_id": str(uuid.uuid4())
+        "session_id": f"{WORKER_ID}-{next(memory_sequence[agent_id])}"
     }
     
+    # The bounded deque drops the oldest entry once the agent is at MEMORY_LIMIT
     agent_memories[agent_id].append(memory_entry)
     
-    # Keep only last 100 entries per agent (in production, use AWS Bedrock Memory)
-    if len(agent_memories[agent_id]) > 100:
-        agent_memories[agent_id] = agent_memories[agent_id][-100:]
+    # One unbuffered append per entry, on the log writer thread, keeps the log complete if
+    # the process dies without blocking the event loop
+    memory_log = memory_logs.get(agent_id)
+    if memory_log is not None and memory_log_writer is not None:
+        memory_log_writer.submit(memory_log.write, orjson.dumps(memory_entry) + b"\n")
     
-    logger.info(f"💾 Stored in {agent_id} memory: {len(agent_memories[agent_id])} entries")
+    logger.info("💾 Stored in %s memory: %d entries", agent_id, len(agent_memories[agent_id]))
+
+# Pre-rendered /ping body; only the timestamp changes between polls
+PING_TEMPLATE = (
+    b'{"status":"success","message":"AppBank AI Twins API is healthy and running",'
+    b'"data":{"service":"AppBank AI Twins","version":"1.0.0"},"timestamp":%s}'
+)
+
+PING_HEADERS = [(b"content-type", b"application/json"), (b"cache-control", b"no-cache")]
+
+class FastPathMiddleware:
+    """Answer health checks and CORS preflights before routing, validation and request logging"""
+
+    def __init__(self, app):
+        self.app = app
+        # Preflights never reach the wrapped app; CORSMiddleware answers them itself
+        self.preflight = CORSMiddleware(app, **CORS_OPTIONS)
+        # Browser /ping calls still need the CORS response headers
+        self.ping = CORSMiddleware(self._ping, **CORS_OPTIONS)
+
+    @staticmethod
+    async def _ping(scope, receive, send):
+        body = PING_TEMPLATE % orjson.dumps(utc_timestamp())
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": PING_HEADERS + [(b"content-length", b"%d" % len(body))]
+        })
+        await send({"type": "http.response.body", "body": body if scope["method"] == "GET" else b""})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            method = scope["method"]
+            if scope["path"] == "/ping" and method in ("GET", "HEAD"):
+                await self.ping(scope, receive, send)
+                return
+            if method == "OPTIONS" and any(name == b"access-control-request-method" for name, _ in scope["headers"]):
+                await self.preflight(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+# Added last, so it wraps the logging and CORS middleware
+app.add_middleware(FastPathMiddleware)
 
 @app.get("/ping", response_model=StandardResponse)
 async def ping():
-    """Health check endpoint"""
-    return create_success_response(
-        message="AppBank AI Twins API is healthy and running",
-        data={"service": "AppBank AI Twins", "version": "1.0.0"}
-    )
+    """Health check endpoint (served by FastPathMiddleware; the route documents it in the schema)"""
+    body = PING_TEMPLATE % orjson.dumps(utc_timestamp())
+    return Response(content=body, media_type="application/json")
+
+# Set DEBUG_ROUTES=1 to expose the cache counters, as agent.py does
+DEBUG_ROUTES = os.getenv("DEBUG_ROUTES") == "1"
+
+async def metrics():
+    """Response cache hit/miss counters"""
+    return {"llm_cache": llm_cache.stats(), "semantic_cache": semantic_cache.stats()}
+
+if DEBUG_ROUTES:
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
 
 @app.get("/agents", response_model=StandardResponse)
 async def list_agents():
     """List all available agents"""
+    # Only the memory counts change between calls
     agents_data = [
-        {
-            "id": agent_id,
-            "name": config["name"],
-            "role": config["role"],
-            "expertise": config["expertise"],
-            "memory_entries": len(agent_memories[agent_id])
-        }
-        for agent_id, config in AGENT_REGISTRY.items()
+        {**agent_info, "memory_entries": len(agent_memories[agent_info["id"]])}
+        for agent_info in AGENT_LISTING
     ]
     
     return create_success_response(
-        message=f"Retrieved {len(agents_data)} available agents",
+        message=AGENT_LISTING_MESSAGE,
         data={"agents": agents_data, "total_count": len(agents_data)}
     )
 
@@ -512,13 +1124,13 @@ async def get_agent_memory(agent_id: str):
     
     memory_data = {
         "agent_id": agent_id,
-        "agent_name": AGENT_REGISTRY[agent_id]["name"],
+        "agent_name": AGENT_PROFILES[agent_id].name,
         "memory_entries": len(agent_memories[agent_id]),
-        "recent_memory": agent_memories[agent_id][-10:] if agent_memories[agent_id] else []
+        "recent_memory": list(islice(reversed(agent_memories[agent_id]), 10))[::-1]
     }
     
     return create_success_response(
-        message=f"Retrieved memory for agent '{AGENT_REGISTRY[agent_id]['name']}'",
+        message=f"Retrieved memory for agent '{AGENT_PROFILES[agent_id].name}'",
         data=memory_data
     )
 
@@ -531,7 +1143,8 @@ async def get_enhanced_memory(agent_id: str, user_id: Optional[str] = None, limi
             data={"agent_id": agent_id}
         )
     
-    memories = memory_manager.retrieve_memories(
+    memories = await asyncio.to_thread(
+        memory_manager.retrieve_memories,
         agent_id=agent_id,
         user_id=user_id,
         limit=limit
@@ -539,7 +1152,7 @@ async def get_enhanced_memory(agent_id: str, user_id: Optional[str] = None, limi
     
     memory_data = {
         "agent_id": agent_id,
-        "agent_name": AGENT_REGISTRY[agent_id]["name"],
+        "agent_name": AGENT_PROFILES[agent_id].name,
         "memory_entries": len(memories),
         "memories": [
             {
@@ -555,7 +1168,7 @@ async def get_enhanced_memory(agent_id: str, user_id: Optional[str] = None, limi
     }
     
     return create_success_response(
-        message=f"Retrieved enhanced memory for agent '{AGENT_REGISTRY[agent_id]['name']}'",
+        message=f"Retrieved enhanced memory for agent '{AGENT_PROFILES[agent_id].name}'",
         data=memory_data
     )
 
@@ -568,22 +1181,22 @@ async def get_agent_personality(agent_id: str):
             data={"agent_id": agent_id}
         )
     
-    personality = learning_engine._get_agent_personality(agent_id)
+    personality = await asyncio.to_thread(learning_engine._get_agent_personality, agent_id)
     
     if not personality:
         personality_data = {
             "agent_id": agent_id,
-            "agent_name": AGENT_REGISTRY[agent_id]["name"],
+            "agent_name": AGENT_PROFILES[agent_id].name,
             "personality": "No personality data available yet"
         }
         return create_success_response(
-            message=f"No personality data available for agent '{AGENT_REGISTRY[agent_id]['name']}'",
+            message=f"No personality data available for agent '{AGENT_PROFILES[agent_id].name}'",
             data=personality_data
         )
     
     personality_data = {
         "agent_id": agent_id,
-        "agent_name": AGENT_REGISTRY[agent_id]["name"],
+        "agent_name": AGENT_PROFILES[agent_id].name,
         "personality": {
             "communication_style": personality.communication_style,
             "technical_preferences": personality.technical_preferences,
@@ -594,7 +1207,7 @@ async def get_agent_personality(agent_id: str):
     }
     
     return create_success_response(
-        message=f"Retrieved personality data for agent '{AGENT_REGISTRY[agent_id]['name']}'",
+        message=f"Retrieved personality data for agent '{AGENT_PROFILES[agent_id].name}'",
         data=personality_data
     )
 
@@ -607,11 +1220,11 @@ async def get_agent_context(agent_id: str, user_id: Optional[str] = None):
             data={"agent_id": agent_id}
         )
     
-    context_window = memory_manager.get_context_window(agent_id, user_id)
+    context_window = await asyncio.to_thread(memory_manager.get_context_window, agent_id, user_id)
     
     context_data = {
         "agent_id": agent_id,
-        "agent_name": AGENT_REGISTRY[agent_id]["name"],
+        "agent_name": AGENT_PROFILES[agent_id].name,
         "context": {
             "recent_conversations": len(context_window.recent_conversations),
             "relevant_knowledge": len(context_window.relevant_knowledge),
@@ -621,7 +1234,7 @@ async def get_agent_context(agent_id: str, user_id: Optional[str] = None):
     }
     
     return create_success_response(
-        message=f"Retrieved context for agent '{AGENT_REGISTRY[agent_id]['name']}'",
+        message=f"Retrieved context for agent '{AGENT_PROFILES[agent_id].name}'",
         data=context_data
     )
 
@@ -635,7 +1248,8 @@ async def trigger_learning(agent_id: str, user_id: Optional[str] = None):
         )
     
     # Get recent conversations for learning
-    conversations = memory_manager.retrieve_memories(
+    conversations = await asyncio.to_thread(
+        memory_manager.retrieve_memories,
         agent_id=agent_id,
         memory_type='conversation',
         user_id=user_id,
@@ -652,10 +1266,11 @@ async def trigger_learning(agent_id: str, user_id: Optional[str] = None):
     conversation_texts = [conv.content for conv in conversations]
     
     # Analyze style patterns
-    insights = learning_engine.style_analyzer.extract_learning_insights(conversation_texts)
+    insights = await asyncio.to_thread(learning_engine.style_analyzer.extract_learning_insights, conversation_texts)
     
     # Store learning insights
-    memory_manager.store_memory(
+    await asyncio.to_thread(
+        memory_manager.store_memory,
         agent_id=agent_id,
         content=json.dumps(insights),
         memory_type='learning_insights',
@@ -665,13 +1280,13 @@ async def trigger_learning(agent_id: str, user_id: Optional[str] = None):
     
     learning_data = {
         "agent_id": agent_id,
-        "agent_name": AGENT_REGISTRY[agent_id]["name"],
+        "agent_name": AGENT_PROFILES[agent_id].name,
         "learning_insights": insights,
         "conversations_analyzed": len(conversations)
     }
     
     return create_success_response(
-        message=f"Learning analysis completed for agent '{AGENT_REGISTRY[agent_id]['name']}'",
+        message=f"Learning analysis completed for agent '{AGENT_PROFILES[agent_id].name}'",
         data=learning_data
     )
 